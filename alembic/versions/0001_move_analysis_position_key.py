@@ -0,0 +1,33 @@
+"""Add the Zobrist position key to move analyses
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Signed 64-bit Zobrist key; NULL for plies stored before this revision
+    op.add_column(
+        "move_analyses", sa.Column("position_key", sa.BigInteger(), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_move_analyses_position_key"),
+        "move_analyses",
+        ["position_key"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_move_analyses_position_key"), table_name="move_analyses")
+    op.drop_column("move_analyses", "position_key")
@@ -1,33 +1,221 @@
-from typing import Dict, Any, Optional
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple, Union
+import asyncio
 import redis
 import json
+import uuid
 from datetime import timedelta
 import hashlib
+from prometheus_client import Counter
+import structlog
+
+from services.common.caching.codec import CODECS, decode_result
+from services.common.caching.local_cache import LocalCache
+from services.common.zobrist import fen_key
+
+logger = structlog.get_logger()
+
+INVALIDATION_CHANNEL = "analysis_cache:invalidate"
+
+CACHE_LOOKUPS = Counter(
+    "analysis_cache_lookups_total", "Analysis cache lookups by outcome", ["result"]
+)
+CACHE_WRITES = Counter(
+    "analysis_cache_writes_total", "Analysis cache writes by outcome", ["result"]
+)
+
+# Replace an entry only if the new analysis is deeper.
+# Returns 0 when skipped, 1 when created and 2 when an existing entry was upgraded.
+CACHE_IF_DEEPER = """
+local current = tonumber(redis.call('HGET', KEYS[1], 'depth'))
+if current and current >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'depth', ARGV[1], 'result', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if current then
+    return 2
+end
+return 1
+"""
 
 
 class CacheManager:
-    def __init__(self, redis_client: redis.Redis, default_ttl: int = 3600):  # 1 hour
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        default_ttl: int = 3600,  # 1 hour
+        local_cache_size: int = 0,  # 0 disables the in-process tier
+        local_ttl: float = 60.0,
+        codec: str = "json",  # "binary" needs a client without decode_responses
+    ):
         self.redis = redis_client
         self.default_ttl = default_ttl
+        self.codec = CODECS[codec]
+        self.cache_if_deeper = self.redis.register_script(CACHE_IF_DEEPER)
+
+        # In-process tier holding (depth, result) per position key
+        self.local = (
+            LocalCache(max_entries=local_cache_size, ttl=local_ttl)
+            if local_cache_size
+            else None
+        )
+        self.instance_id = uuid.uuid4().hex
+        self.in_flight: Dict[str, Tuple[int, asyncio.Future]] = {}
+        self.invalidation_task: Optional[asyncio.Task] = None
+
+        # Metrics are shared by every manager in the process
+        self.lookups = CACHE_LOOKUPS
+        self.writes = CACHE_WRITES
 
     def generate_key(self, components: Dict[str, Any]) -> str:
         """Generate a cache key from components."""
         key_str = json.dumps(components, sort_keys=True)
         return hashlib.md5(key_str.encode()).hexdigest()
 
-    async def get_cached_analysis(self, position: str, depth: int) -> Optional[Dict]:
-        """Get cached analysis result."""
-        key = self.generate_key({"position": position, "depth": depth})
+    @staticmethod
+    def position_key(position: Union[str, int]) -> str:
+        """Key for a FEN or a precomputed Zobrist key.
+
+        Zobrist keys ignore the move clocks, so transpositions share an entry;
+        callers replaying a game can pass the key and skip FEN parsing.
+        """
+        if isinstance(position, str):
+            position = fen_key(position)
+        return f"analysis:{position & 0xFFFFFFFFFFFFFFFF:016x}"
+
+    async def get_cached_analysis(
+        self, position: Union[str, int], depth: int
+    ) -> Optional[Dict]:
+        """Get a cached analysis searched to at least ``depth``."""
+        key = self.position_key(position)
+
+        if self.local is not None:
+            entry = self.local.get(key)
+            if entry is not None and entry[0] >= depth:
+                self.lookups.labels(result="local_hit").inc()
+                return entry[1]
+
+        cached_depth, cached = await self.redis.hmget(key, "depth", "result")
+        if cached is None:
+            self.lookups.labels(result="miss").inc()
+            return None
 
-        cached = await self.redis.get(key)
-        if cached:
-            return json.loads(cached)
-        return None
+        result = decode_result(cached)
+        if self.local is not None:
+            self.local.set(key, (int(cached_depth), result))
+        if int(cached_depth) < depth:
+            self.lookups.labels(result="too_shallow").inc()
+            return None
+
+        self.lookups.labels(result="hit").inc()
+        return result
 
     async def cache_analysis(
-        self, position: str, depth: int, result: Dict, ttl: Optional[int] = None
-    ):
-        """Cache analysis result."""
-        key = self.generate_key({"position": position, "depth": depth})
+        self,
+        position: Union[str, int],
+        depth: int,
+        result: Dict,
+        ttl: Optional[int] = None,
+    ) -> bool:
+        """Cache analysis result unless a deeper one is already stored."""
+        key = self.position_key(position)
+
+        outcome = await self.cache_if_deeper(
+            keys=[key], args=[depth, self.codec.encode(result), ttl or self.default_ttl]
+        )
+        self.writes.labels(
+            result={0: "skipped", 1: "created", 2: "upgraded"}[int(outcome)]
+        ).inc()
+
+        if outcome and self.local is not None:
+            self.local.set(key, (depth, result))
+            # Other pods may hold the shallower entry in their local tier
+            await self.redis.publish(
+                INVALIDATION_CHANNEL,
+                json.dumps({"key": key, "origin": self.instance_id}),
+            )
+        return bool(outcome)
+
+    async def get_or_analyze(
+        self,
+        position: Union[str, int],
+        depth: int,
+        analyze: Callable[[], Awaitable[Dict]],
+        ttl: Optional[int] = None,
+    ) -> Dict:
+        """Return a cached analysis or run ``analyze`` exactly once per position.
+
+        Concurrent misses for the same position wait on the analysis already
+        in flight, as long as it searches at least as deep as they need. If
+        that analysis is cancelled, the waiters start over and one of them
+        runs it instead.
+        """
+        cached = await self.get_cached_analysis(position, depth)
+        if cached is not None:
+            return cached
+
+        key = self.position_key(position)
+        pending = self.in_flight.get(key)
+        if pending is not None and pending[0] >= depth:
+            self.lookups.labels(result="coalesced").inc()
+            try:
+                return await asyncio.shield(pending[1])
+            except asyncio.CancelledError:
+                # Only the leader was cancelled, not this waiter
+                if not pending[1].cancelled():
+                    raise
+            return await self.get_or_analyze(position, depth, analyze, ttl)
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = (depth, future)
+        try:
+            result = await analyze()
+        except asyncio.CancelledError:
+            self._release_in_flight(key, future)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._release_in_flight(key, future)
+            future.set_exception(e)
+            # Waiters see the error; mark it retrieved for the no-waiter case
+            future.exception()
+            raise
+
+        self._release_in_flight(key, future)
+        future.set_result(result)
+        try:
+            await self.cache_analysis(position, depth, result, ttl)
+        except Exception as e:
+            # The analysis is still good, only the next lookup misses
+            self.writes.labels(result="failed").inc()
+            logger.warning("Failed to cache analysis", key=key, error=str(e))
+        return result
+
+    def _release_in_flight(self, key: str, future: asyncio.Future):
+        if self.in_flight.get(key, (None, None))[1] is future:
+            del self.in_flight[key]
+
+    def start_invalidation_listener(self):
+        """Keep the local tier coherent with writes made by other pods."""
+        if self.local is not None and self.invalidation_task is None:
+            self.invalidation_task = asyncio.create_task(
+                self._listen_for_invalidations()
+            )
+
+    async def _listen_for_invalidations(self):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                payload = json.loads(message["data"])
+                if payload["origin"] != self.instance_id:
+                    self.local.invalidate(payload["key"])
+        finally:
+            await pubsub.unsubscribe(INVALIDATION_CHANNEL)
 
-        await self.redis.setex(key, ttl or self.default_ttl, json.dumps(result))
+    async def close(self):
+        if self.invalidation_task is not None:
+            self.invalidation_task.cancel()
+            self.invalidation_task = None
@@ -0,0 +1,168 @@
+"""Encodings for cached analysis results.
+
+JSON entries start with ``{`` or ``[``; binary entries start with a version
+byte below 0x20, so ``decode_result`` can read either regardless of which
+codec wrote them.
+
+Binary version 1 layout for an engine-service analysis payload::
+
+    version u8 | depth varint | nodes varint | time_ms varint | lines varint
+    per line: score i16 | mate i8 (-128 if none) | pv_length varint | pv u16...
+
+Moves are packed as from (6 bits) | to (6 bits) | promotion piece (3 bits).
+Anything that doesn't fit that shape falls back to JSON.
+"""
+
+from typing import Any, Dict, List, Tuple
+import json
+import struct
+
+BINARY_V1 = 0x01
+
+LINE_HEADER = struct.Struct("<hb")
+NO_MATE = -128
+
+FILES = "abcdefgh"
+SQUARE_NAMES = [f + str(r) for r in range(1, 9) for f in FILES]
+SQUARE_INDEX = {name: index for index, name in enumerate(SQUARE_NAMES)}
+PROMOTIONS = {"n": 2, "b": 3, "r": 4, "q": 5}
+PROMOTION_SYMBOLS = {value: symbol for symbol, value in PROMOTIONS.items()}
+
+RESULT_KEYS = {"moves", "depth", "time", "nodes", "score"}
+LINE_KEYS = {"move", "score", "mate", "pv"}
+
+
+class UnsupportedResult(ValueError):
+    """The result can't be represented by the binary codec."""
+
+
+def encode_varint(value: int, out: bytearray):
+    if value < 0:
+        raise UnsupportedResult("varints must be non-negative")
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_move(uci: str) -> int:
+    """Pack a UCI move string into 16 bits."""
+    try:
+        promotion = PROMOTIONS[uci[4]] if len(uci) == 5 else 0
+        return SQUARE_INDEX[uci[:2]] | SQUARE_INDEX[uci[2:4]] << 6 | promotion << 12
+    except (KeyError, IndexError):
+        raise UnsupportedResult(f"Cannot pack move {uci!r}")
+
+
+def decode_move(value: int) -> str:
+    return (
+        SQUARE_NAMES[value & 0x3F]
+        + SQUARE_NAMES[value >> 6 & 0x3F]
+        + PROMOTION_SYMBOLS.get(value >> 12, "")
+    )
+
+
+class JSONCodec:
+    name = "json"
+
+    def encode(self, result: Any) -> bytes:
+        return json.dumps(result).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return decode_result(data)
+
+
+class BinaryCodec:
+    name = "binary"
+
+    def encode(self, result: Any) -> bytes:
+        try:
+            return self._encode(result)
+        except (UnsupportedResult, KeyError, TypeError, ValueError, struct.error):
+            return json.dumps(result).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return decode_result(data)
+
+    @staticmethod
+    def _encode(result: Dict) -> bytes:
+        if not isinstance(result, dict) or set(result) != RESULT_KEYS:
+            raise UnsupportedResult("Not an analysis payload")
+        lines = result["moves"]
+        if not lines or result["score"] != lines[0]["score"]:
+            raise UnsupportedResult("Top-level score must match the first line")
+
+        out = bytearray([BINARY_V1])
+        encode_varint(result["depth"], out)
+        encode_varint(result["nodes"], out)
+        encode_varint(round(result["time"] * 1000), out)
+        encode_varint(len(lines), out)
+
+        for line in lines:
+            pv = line["pv"]
+            if set(line) != LINE_KEYS or not pv or line["move"] != pv[0]:
+                raise UnsupportedResult("Line must start with its best move")
+            mate = NO_MATE if line["mate"] is None else line["mate"]
+            if mate == NO_MATE and line["mate"] is not None:
+                raise UnsupportedResult("Mate distance out of range")
+            out += LINE_HEADER.pack(line["score"], mate)
+            encode_varint(len(pv), out)
+            out += struct.pack(f"<{len(pv)}H", *map(encode_move, pv))
+
+        return bytes(out)
+
+
+def _decode_binary_v1(data: bytes) -> Dict:
+    depth, offset = decode_varint(data, 1)
+    nodes, offset = decode_varint(data, offset)
+    time_ms, offset = decode_varint(data, offset)
+    line_count, offset = decode_varint(data, offset)
+
+    lines: List[Dict] = []
+    for _ in range(line_count):
+        score, mate = LINE_HEADER.unpack_from(data, offset)
+        pv_length, offset = decode_varint(data, offset + LINE_HEADER.size)
+        pv = [
+            decode_move(value)
+            for value in struct.unpack_from(f"<{pv_length}H", data, offset)
+        ]
+        offset += 2 * pv_length
+        lines.append(
+            {
+                "move": pv[0],
+                "score": score,
+                "mate": None if mate == NO_MATE else mate,
+                "pv": pv,
+            }
+        )
+
+    return {
+        "moves": lines,
+        "depth": depth,
+        "time": time_ms / 1000,
+        "nodes": nodes,
+        "score": lines[0]["score"],
+    }
+
+
+def decode_result(data: bytes) -> Any:
+    """Decode an entry written by any codec version, including plain JSON."""
+    if isinstance(data, str):
+        return json.loads(data)
+    if data[0] == BINARY_V1:
+        return _decode_binary_v1(data)
+    return json.loads(data)
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec(), BinaryCodec())}
@@ -0,0 +1,81 @@
+"""Compare cache entry size and encode/decode cost of the analysis codecs.
+
+python -m services.common.caching.codec_benchmark --entries 20000 --multipv 3
+"""
+
+from typing import Dict, List
+import argparse
+import random
+import time
+
+from services.common.caching.codec import CODECS, FILES, decode_result
+
+
+def random_move(rng: random.Random) -> str:
+    squares = [f + str(r) for f in FILES for r in range(1, 9)]
+    move = rng.choice(squares) + rng.choice(squares)
+    return move + "q" if rng.random() < 0.01 else move
+
+
+def sample_result(rng: random.Random, multipv: int, pv_length: int) -> Dict:
+    """An analysis payload shaped like the engine service response."""
+    lines = []
+    for index in range(multipv):
+        pv = [random_move(rng) for _ in range(pv_length)]
+        mate = rng.choice([None] * 19 + [rng.randint(-10, 10)])
+        lines.append(
+            {
+                "move": pv[0],
+                "score": (
+                    (10000 - abs(mate)) * (1 if mate > 0 else -1)
+                    if mate
+                    else rng.randint(-400, 400) - index * 15
+                ),
+                "mate": mate,
+                "pv": pv,
+            }
+        )
+    return {
+        "moves": lines,
+        "depth": rng.randint(16, 30),
+        "time": round(rng.uniform(0.05, 5.0), 3),
+        "nodes": rng.randint(10**5, 5 * 10**7),
+        "score": lines[0]["score"],
+    }
+
+
+def benchmark(results: List[Dict]):
+    print(f"{'codec':<8} {'bytes/entry':>12} {'encode us':>10} {'decode us':>10}")
+    for codec in CODECS.values():
+        start = time.perf_counter()
+        encoded = [codec.encode(result) for result in results]
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decoded = [decode_result(data) for data in encoded]
+        decode_time = time.perf_counter() - start
+
+        assert decoded == results, f"{codec.name} did not round-trip"
+        print(
+            f"{codec.name:<8} {sum(map(len, encoded)) / len(results):>12.1f} "
+            f"{encode_time / len(results) * 1e6:>10.2f} "
+            f"{decode_time / len(results) * 1e6:>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--multipv", type=int, default=3)
+    parser.add_argument("--pv-length", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    benchmark(
+        [sample_result(rng, args.multipv, args.pv_length) for _ in range(args.entries)]
+    )
+
+
+if __name__ == "__main__":
+    main()
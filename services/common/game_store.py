@@ -0,0 +1,201 @@
+"""Columnar (Parquet) store for parsed PGN games.
+
+Games from ``PGNHandler`` are written as two hive-partitioned datasets under
+one root, both partitioned by ``month`` (``YYYY-MM`` from the PGN date)::
+
+    root/games/month=2024-01/part-....parquet   one row per game
+    root/moves/month=2024-01/part-....parquet   one row per game, list columns
+
+Readers open them with ``games_dataset``/``moves_dataset`` and select columns
+and filters so only the needed data is read.
+"""
+
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import structlog
+
+logger = structlog.get_logger()
+
+MATE_SCORE = 10000
+
+LICHESS_GAME = re.compile(
+    r"https?://(?:www\.)?lichess\.org/([A-Za-z0-9]{8})(?:[/?#]|$)"
+)
+
+GAMES_SCHEMA = pa.schema(
+    [
+        ("game_id", pa.string()),
+        ("event", pa.string()),
+        ("white", pa.string()),
+        ("black", pa.string()),
+        ("white_elo", pa.int32()),
+        ("black_elo", pa.int32()),
+        ("result", pa.string()),
+        ("date", pa.string()),
+        ("eco", pa.string()),
+        ("time_control", pa.string()),
+        ("ply_count", pa.int32()),
+        ("month", pa.string()),
+    ]
+)
+
+MOVES_SCHEMA = pa.schema(
+    [
+        ("game_id", pa.string()),
+        ("uci", pa.list_(pa.string())),
+        ("clock", pa.list_(pa.float32())),  # seconds left after the move
+        ("eval", pa.list_(pa.int32())),  # centipawns from White's point of view
+        ("key", pa.list_(pa.int64())),  # Zobrist key of the position before the move
+        ("month", pa.string()),
+    ]
+)
+
+
+def game_month(date: str) -> str:
+    """``YYYY-MM`` partition for a PGN ``YYYY.MM.DD`` date."""
+    year, _, rest = date.partition(".")
+    month = rest[:2]
+    if year.isdigit() and month.isdigit():
+        return f"{year}-{month}"
+    return "unknown"
+
+
+def _elo(value: str) -> Optional[int]:
+    return int(value) if value.isdigit() else None
+
+
+def _centipawns(score) -> Optional[int]:
+    return None if score is None else score.white().score(mate_score=MATE_SCORE)
+
+
+def default_game_id(game: Dict) -> str:
+    """Lichess game id from ``Site``, else a hash of the headers and moves.
+
+    Other sites ("Chess.com", "Berlin GER", "?") are shared by many games, so
+    those games are identified by their content instead; re-importing the
+    same archive yields the same ids.
+    """
+    match = LICHESS_GAME.match(game.get("site", ""))
+    if match:
+        return match.group(1)
+    digest = hashlib.sha1()
+    for value in (
+        game.get("site", ""),
+        game["event"],
+        game["white"]["name"],
+        game["black"]["name"],
+        game["date"],
+        game["result"],
+        game["time_control"],
+        *(move["move"] for move in game["moves"]),
+    ):
+        digest.update(value.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:24]
+
+
+class GameStoreWriter:
+    """Buffers parsed games and appends them to the store in Parquet files."""
+
+    def __init__(self, root: str, batch_size: int = 10000):
+        self.root = root
+        self.batch_size = batch_size
+        self.games: List[Dict] = []
+        self.moves: List[Dict] = []
+
+    def add(self, game: Dict, game_id: Optional[str] = None):
+        """Buffer a game from ``PGNHandler``.
+
+        Moves need the ``move``, ``clock``, ``eval`` and ``key`` fields. The id
+        defaults to the Lichess game id from ``Site``, see ``default_game_id``.
+        """
+        month = game_month(game["date"])
+        moves = game["moves"]
+        game_id = game_id or default_game_id(game)
+        self.games.append(
+            {
+                "game_id": game_id,
+                "event": game["event"],
+                "white": game["white"]["name"],
+                "black": game["black"]["name"],
+                "white_elo": _elo(game["white"]["elo"]),
+                "black_elo": _elo(game["black"]["elo"]),
+                "result": game["result"],
+                "date": game["date"],
+                "eco": game["eco"],
+                "time_control": game["time_control"],
+                "ply_count": len(moves),
+                "month": month,
+            }
+        )
+        self.moves.append(
+            {
+                "game_id": game_id,
+                "uci": [move["move"] for move in moves],
+                "clock": [move["clock"] for move in moves],
+                "eval": [_centipawns(move["eval"]) for move in moves],
+                "key": [move["key"] for move in moves],
+                "month": month,
+            }
+        )
+        if len(self.games) >= self.batch_size:
+            self.flush()
+
+    async def store_games(self, games: List[Dict]):
+        """``PGNImporter`` store callback; Parquet writes run off the event loop.
+
+        Each call is flushed so games are on disk before the importer
+        checkpoints past them.
+        """
+        await asyncio.to_thread(self._add_all, games)
+
+    def _add_all(self, games: List[Dict]):
+        for game in games:
+            self.add(game)
+        self.flush()
+
+    def flush(self):
+        if not self.games:
+            return
+        basename = f"part-{uuid.uuid4().hex}-{{i}}.parquet"
+        for name, rows, schema in (
+            ("games", self.games, GAMES_SCHEMA),
+            ("moves", self.moves, MOVES_SCHEMA),
+        ):
+            pq.write_to_dataset(
+                pa.Table.from_pylist(rows, schema=schema),
+                os.path.join(self.root, name),
+                partition_cols=["month"],
+                basename_template=basename,
+            )
+        logger.info("Games written to store", root=self.root, games=len(self.games))
+        self.games, self.moves = [], []
+
+    def close(self):
+        self.flush()
+
+
+def _dataset(root: str, name: str, schema: pa.Schema) -> ds.Dataset:
+    return ds.dataset(
+        os.path.join(root, name),
+        schema=schema,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("month", pa.string())]), flavor="hive"
+        ),
+    )
+
+
+def games_dataset(root: str) -> ds.Dataset:
+    return _dataset(root, "games", GAMES_SCHEMA)
+
+
+def moves_dataset(root: str) -> ds.Dataset:
+    return _dataset(root, "moves", MOVES_SCHEMA)
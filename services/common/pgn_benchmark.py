@@ -0,0 +1,47 @@
+"""Parse rate of PGNHandler with and without a move projection.
+
+python -m services.common.pgn_benchmark lichess_db_2024-01.pgn.zst --games 1000000
+"""
+
+from typing import Collection, Optional
+import argparse
+import itertools
+import time
+import chess.pgn
+
+from services.common.pgn_handler import MOVE_FIELDS, PGNHandler
+from services.common.pgn_io import open_pgn
+
+
+def parse_rate(path: str, games: int, fields: Optional[Collection[str]]) -> float:
+    """Games per second, including reading every projected field once."""
+    handler = PGNHandler()
+    parsed = 0
+    start = time.perf_counter()
+    with open_pgn(path) as pgn_file:
+        for _ in itertools.repeat(None, games):
+            game = chess.pgn.read_game(pgn_file)
+            if game is None:
+                break
+            for move in handler._process_game(game, fields)["moves"]:
+                for field in move:
+                    move[field]
+            parsed += 1
+    return parsed / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pgn", help="PGN dump, e.g. a Lichess monthly database")
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument(
+        "--fields", nargs="+", default=["move", "clock"], choices=MOVE_FIELDS
+    )
+    args = parser.parse_args()
+
+    for label, fields in (("all fields", None), (" ".join(args.fields), args.fields)):
+        print(f"{label:<24} {parse_rate(args.pgn, args.games, fields):>10.1f} games/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,323 @@
+import chess
 import chess.pgn
 import io
-from typing import List, Dict, Generator
+import mmap
+import os
+import re
+from collections.abc import Mapping
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    List,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    TextIO,
+    Tuple,
+)
 from datetime import datetime
 
+from services.common.pgn_io import open_pgn
+from services.common.zobrist import ZobristTracker
+
+MOVE_FIELDS = ("move", "san", "fen", "key", "clock", "eval")
+LAZY_FIELDS = {"san", "fen"}
+
+# A game's tag-pair section: consecutive [Name "value"] lines
+TAG_SECTION = re.compile(rb'^(?:\[[A-Za-z0-9_]+[ \t]+"[^\r\n]*"\][ \t]*\r?\n)+', re.M)
+TAG_PAIR = re.compile(rb'\[([A-Za-z0-9_]+)[ \t]+"((?:[^"\\\r\n]|\\.)*)"\]')
+
+
+def _tag_value(value: bytes) -> str:
+    return (
+        value.decode("utf-8", errors="replace")
+        .replace('\\"', '"')
+        .replace("\\\\", "\\")
+    )
+
+
+def _elo(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def header_filter(
+    players: Optional[Collection[str]] = None,
+    min_elo: Optional[int] = None,
+    max_elo: Optional[int] = None,
+    time_controls: Optional[Collection[str]] = None,
+) -> Callable[[Dict[str, str]], bool]:
+    """Predicate for ``PGNHandler.scan_headers``.
+
+    Matches games with one of ``players`` on either side, either rating within
+    ``[min_elo, max_elo]`` and a ``TimeControl`` among ``time_controls``.
+    """
+    players = set(players) if players else None
+    time_controls = set(time_controls) if time_controls else None
+
+    def matches(headers: Dict[str, str]) -> bool:
+        if players and not (
+            headers.get("White") in players or headers.get("Black") in players
+        ):
+            return False
+        if time_controls and headers.get("TimeControl") not in time_controls:
+            return False
+        if min_elo is not None or max_elo is not None:
+            return any(
+                elo is not None
+                and (min_elo is None or elo >= min_elo)
+                and (max_elo is None or elo <= max_elo)
+                for elo in (
+                    _elo(headers.get("WhiteElo")),
+                    _elo(headers.get("BlackElo")),
+                )
+            )
+        return True
+
+    return matches
+
+
+class LazyMove(Mapping):
+    """Per-ply record whose SAN and FEN are only generated when read."""
+
+    __slots__ = ("fields", "values", "board", "move")
+
+    def __init__(
+        self,
+        fields: Collection[str],
+        values: Dict[str, Any],
+        board: Optional[chess.Board],
+        move: chess.Move,
+    ):
+        self.fields = fields
+        self.values = values
+        self.board = board  # snapshot before the move, only kept for lazy fields
+        self.move = move
+
+    def __getitem__(self, field: str) -> Any:
+        try:
+            return self.values[field]
+        except KeyError:
+            if field not in self.fields or field not in LAZY_FIELDS:
+                raise
+        value = self.board.san(self.move) if field == "san" else self.board.fen()
+        self.values[field] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __repr__(self) -> str:
+        return f"LazyMove({self.values!r})"
+
 
 class PGNHandler:
     def __init__(self):
         self.cache = {}  # Optional caching of processed games
 
-    def process_pgn_file(self, pgn_content: str) -> Generator[Dict, None, None]:
-        """Process a PGN file and yield game data."""
-        pgn_io = io.StringIO(pgn_content)
+    def process_pgn_file(
+        self, pgn_content: str, fields: Optional[Collection[str]] = None
+    ) -> Generator[Dict, None, None]:
+        """Process a PGN file and yield game data.
+
+        ``fields`` projects each move onto a subset of ``MOVE_FIELDS``; SAN and
+        FEN are then only generated for moves where they are read.
+        """
+        yield from self._read_games(io.StringIO(pgn_content), fields)
 
+    def process_pgn_path(
+        self, file_path: str, fields: Optional[Collection[str]] = None
+    ) -> Generator[Dict, None, None]:
+        """Like ``process_pgn_file`` but streams from a plain or compressed file."""
+        with open_pgn(file_path) as pgn_file:
+            yield from self._read_games(pgn_file, fields)
+
+    def _read_games(
+        self, pgn_io: TextIO, fields: Optional[Collection[str]]
+    ) -> Generator[Dict, None, None]:
         while True:
             game = chess.pgn.read_game(pgn_io)
             if game is None:
                 break
 
-            yield {
-                "event": game.headers.get("Event", "Unknown"),
-                "white": {
-                    "name": game.headers.get("White", "Unknown"),
-                    "elo": game.headers.get("WhiteElo", "?"),
-                },
-                "black": {
-                    "name": game.headers.get("Black", "Unknown"),
-                    "elo": game.headers.get("BlackElo", "?"),
-                },
-                "result": game.headers.get("Result", "*"),
-                "date": game.headers.get("Date", "????:??:??"),
-                "moves": self._process_moves(game),
-                "eco": game.headers.get("ECO", ""),
-                "time_control": game.headers.get("TimeControl", ""),
-            }
+            yield self._process_game(game, fields)
+
+    def _process_game(
+        self, game: chess.pgn.Game, fields: Optional[Collection[str]] = None
+    ) -> Dict:
+        return {
+            "event": game.headers.get("Event", "Unknown"),
+            "site": game.headers.get("Site", ""),
+            "white": {
+                "name": game.headers.get("White", "Unknown"),
+                "elo": game.headers.get("WhiteElo", "?"),
+            },
+            "black": {
+                "name": game.headers.get("Black", "Unknown"),
+                "elo": game.headers.get("BlackElo", "?"),
+            },
+            "result": game.headers.get("Result", "*"),
+            "date": game.headers.get("Date", "????:??:??"),
+            "moves": (
+                self._process_moves(game)
+                if fields is None
+                else self._project_moves(game, fields)
+            ),
+            "eco": game.headers.get("ECO", ""),
+            "time_control": game.headers.get("TimeControl", ""),
+        }
 
     def _process_moves(self, game: chess.pgn.Game) -> List[Dict]:
         """Process moves with timing information if available."""
         moves = []
-        board = game.board()
+        tracker = ZobristTracker(game.board())
+        board = tracker.board
 
         for node in game.mainline():
             move_data = {
                 "move": node.move.uci(),
                 "san": board.san(node.move),
                 "fen": board.fen(),
-                "clock": node.clock() if node.clock() is not None else None,
-                "eval": node.eval() if node.eval() is not None else None,
+                "key": tracker.key,
+                "clock": node.clock(),
+                "eval": node.eval(),
             }
             moves.append(move_data)
-            board.push(node.move)
+            tracker.push(node.move)
+
+        return moves
+
+    def _project_moves(
+        self, game: chess.pgn.Game, fields: Collection[str]
+    ) -> List[LazyMove]:
+        """Like ``_process_moves`` but only with the requested fields."""
+        unknown = set(fields) - set(MOVE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown move fields: {sorted(unknown)}")
+
+        fields = tuple(field for field in MOVE_FIELDS if field in fields)
+        lazy = not LAZY_FIELDS.isdisjoint(fields)
+        tracker = ZobristTracker(game.board()) if "key" in fields else None
+        board = tracker.board if tracker else game.board()
+        moves = []
+
+        for node in game.mainline():
+            move = node.move
+            values = {}
+            if "move" in fields:
+                values["move"] = move.uci()
+            if "key" in fields:
+                values["key"] = tracker.key
+            if "clock" in fields:
+                values["clock"] = node.clock()
+            if "eval" in fields:
+                values["eval"] = node.eval()
+            moves.append(
+                LazyMove(
+                    fields, values, board.copy(stack=False) if lazy else None, move
+                )
+            )
+            if tracker:
+                tracker.push(move)
+            else:
+                board.push(move)
 
         return moves
 
-    async def import_pgn_database(self, file_path: str) -> int:
-        """Import a large PGN database for training."""
-        imported_count = 0
+    def scan_headers(
+        self,
+        file_path: str,
+        predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+        start: int = 0,
+    ) -> Generator[Tuple[int, Dict[str, str]], None, None]:
+        """Yield ``(byte offset, headers)`` of matching games without parsing moves.
+
+        Tag sections are found with a raw scan over the memory-mapped file;
+        pass the offsets to ``read_games_at`` to fully parse only those games.
+        ``start`` must be the beginning of a line. Needs an uncompressed file.
+        """
+        if os.path.getsize(file_path) <= start:
+            return
+        with open(file_path, "rb") as pgn_file, mmap.mmap(
+            pgn_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for section in TAG_SECTION.finditer(data, start):
+                headers = {
+                    name.decode(): _tag_value(value)
+                    for name, value in TAG_PAIR.findall(section.group())
+                }
+                if predicate is None or predicate(headers):
+                    yield section.start(), headers
+
+    def read_games_at(
+        self,
+        file_path: str,
+        offsets: Iterable[int],
+        fields: Optional[Collection[str]] = None,
+    ) -> Generator[Dict, None, None]:
+        """Parse the games starting at the given byte offsets."""
+        with open(file_path, "rb") as pgn_file:
+            for offset in offsets:
+                pgn_file.seek(offset)
+                text = io.TextIOWrapper(pgn_file, encoding="utf-8", errors="replace")
+                try:
+                    game = chess.pgn.read_game(text)
+                finally:
+                    text.detach()
+                if game is not None:
+                    yield self._process_game(game, fields)
+
+    def find_games(
+        self,
+        file_path: str,
+        player: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        numbers: Optional[Iterable[int]] = None,
+        fields: Optional[Collection[str]] = None,
+    ) -> Generator[Dict, None, None]:
+        """Parse selected games through the archive's sidecar index.
+
+        The index is created or brought up to date first; ``numbers`` selects
+        games by position in the archive, otherwise player and date filter.
+        """
+        from services.common.pgn_index import PGNIndex
+
+        index = PGNIndex(file_path)
+        try:
+            index.update()
+            offsets = (
+                index.offsets(numbers)
+                if numbers is not None
+                else index.find(player, date_from, date_to)
+            )
+        finally:
+            index.close()
+        yield from self.read_games_at(file_path, offsets, fields)
 
-        with open(file_path) as pgn_file:
-            while True:
-                game = chess.pgn.read_game(pgn_file)
-                if game is None:
-                    break
+    async def import_pgn_database(
+        self,
+        file_path: str,
+        store_games: Callable[[List[Dict]], Awaitable[None]],
+        checkpoint_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        fields: Optional[Collection[str]] = None,
+    ) -> int:
+        """Import a large PGN database for training.
 
-                # Process and store game data
-                game_data = self._process_game(game)
-                await self.store_game_data(game_data)
-                imported_count += 1
+        Games are parsed in worker processes and handed to ``store_games`` in
+        batches; with ``checkpoint_path`` an interrupted import resumes.
+        """
+        from services.common.pgn_import import PGNImporter
 
-        return imported_count
+        importer = PGNImporter(workers=workers, fields=fields)
+        return await importer.run(file_path, store_games, checkpoint_path)
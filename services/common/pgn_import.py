@@ -0,0 +1,274 @@
+"""Parallel, resumable import of large PGN databases.
+
+The file is cut into chunks at ``[Event`` boundaries, chunks are parsed in
+worker processes, and parsed games flow through a bounded queue to an async
+store callback. Chunks are stored in file order and the end offset of each
+stored chunk is checkpointed, so an interrupted import resumes exactly after
+the last stored game.
+
+Plain files are split by seeking and workers read their own byte range.
+Compressed archives are decompressed as a stream in the parent and chunks are
+sent to the workers; their offsets count decompressed bytes.
+"""
+
+from typing import (
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+import asyncio
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import chess.pgn
+import structlog
+
+from services.common.pgn_handler import PGNHandler
+from services.common.pgn_io import compression, open_binary
+
+logger = structlog.get_logger()
+
+GAME_START = b"\n[Event "
+
+StoreGames = Callable[[List[Dict]], Awaitable[None]]
+
+# (start, end, decompressed bytes or None when the worker reads the file)
+Chunk = Tuple[int, int, Optional[bytes]]
+
+
+def next_game_start(handle, offset: int, end: int) -> int:
+    """First ``[Event`` line at or after ``offset``, or ``end`` if none."""
+    if offset == 0:
+        return 0
+    handle.seek(offset - 1)
+    buffer = b""
+    base = offset - 1  # file offset of buffer[0]
+    keep = len(GAME_START) - 1
+    while True:
+        block = handle.read(1 << 16)
+        if not block:
+            return end
+        buffer += block
+        found = buffer.find(GAME_START)
+        if found != -1:
+            return min(base + found + 1, end)
+        base += len(buffer) - keep
+        buffer = buffer[-keep:]
+
+
+def chunk_boundaries(
+    path: str, start: int = 0, chunk_size: int = 8 << 20
+) -> List[Tuple[int, int]]:
+    """Byte ranges of roughly ``chunk_size`` that each hold whole games."""
+    size = os.path.getsize(path)
+    boundaries = []
+    with open(path, "rb") as handle:
+        offset = next_game_start(handle, start, size) if start else 0
+        while offset < size:
+            end = next_game_start(handle, min(offset + chunk_size, size), size)
+            boundaries.append((offset, end))
+            offset = end
+    return boundaries
+
+
+def stream_chunks(
+    path: str, start: int = 0, chunk_size: int = 8 << 20
+) -> Iterator[Chunk]:
+    """Chunks of a compressed archive, cut at ``[Event`` boundaries."""
+    with open_binary(path) as stream:
+        skipped = 0
+        while skipped < start:
+            block = stream.read(min(chunk_size, start - skipped))
+            if not block:
+                return
+            skipped += len(block)
+
+        offset, pending = start, b""
+        while True:
+            block = stream.read(chunk_size)
+            data = pending + block
+            if not block:
+                if data:
+                    yield offset, offset + len(data), data
+                return
+            cut = data.rfind(GAME_START) + 1
+            if cut <= 0:
+                pending = data
+                continue
+            yield offset, offset + cut, data[:cut]
+            offset, pending = offset + cut, data[cut:]
+
+
+def parse_chunk(
+    path: str,
+    start: int,
+    end: int,
+    fields: Optional[Collection[str]],
+    data: Optional[bytes] = None,
+) -> List[Dict]:
+    """Worker entry point: parse the games in ``[start, end)``."""
+    if data is None:
+        with open(path, "rb") as handle:
+            handle.seek(start)
+            data = handle.read(end - start)
+
+    handler = PGNHandler()
+    games = []
+    pgn_io = io.StringIO(data.decode("utf-8", errors="replace"))
+    while True:
+        game = chess.pgn.read_game(pgn_io)
+        if game is None:
+            break
+        game_data = handler._process_game(game, fields)
+        # Lazy moves don't cross the process boundary
+        game_data["moves"] = [dict(move) for move in game_data["moves"]]
+        games.append(game_data)
+    return games
+
+
+class Checkpoint:
+    """Byte offset below which every game has been stored."""
+
+    def __init__(self, path: Optional[str], source: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+
+    def load(self) -> Tuple[int, int]:
+        """Resume offset and games stored before it."""
+        if not self.path or not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path) as handle:
+            state = json.load(handle)
+        if state.get("source") != self.source:
+            raise ValueError(f"Checkpoint {self.path} belongs to {state['source']}")
+        return state["offset"], state["games"]
+
+    def save(self, offset: int, games: int):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump({"source": self.source, "offset": offset, "games": games}, handle)
+        os.replace(temporary, self.path)
+
+
+class PGNImporter:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk_size: int = 8 << 20,  # bytes of PGN per work unit
+        queue_size: int = 8,  # parsed chunks waiting to be stored
+        fields: Optional[Collection[str]] = None,  # move projection, see PGNHandler
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.fields = fields
+
+    async def run(
+        self,
+        file_path: str,
+        store_games: StoreGames,
+        checkpoint_path: Optional[str] = None,
+    ) -> int:
+        """Import ``file_path`` and return the number of games stored by this run."""
+        checkpoint = Checkpoint(checkpoint_path, file_path)
+        resume_from, previously_stored = checkpoint.load()
+        if compression(file_path) is None:
+            chunks = iter(
+                [
+                    (start, end, None)
+                    for start, end in chunk_boundaries(
+                        file_path, resume_from, self.chunk_size
+                    )
+                ]
+            )
+        else:
+            chunks = stream_chunks(file_path, resume_from, self.chunk_size)
+        if resume_from:
+            logger.info("Resuming PGN import", path=file_path, offset=resume_from)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Bound parsed-but-unstored chunks: parsing only runs ahead of the
+        # store by the queue plus one chunk per worker
+        slots = asyncio.Semaphore(self.queue_size + self.workers)
+        ends: Dict[int, int] = {}
+        stored = 0
+
+        async def produce(executor: ProcessPoolExecutor):
+            async def parse(index: int, chunk: Chunk):
+                try:
+                    games = await loop.run_in_executor(
+                        executor,
+                        parse_chunk,
+                        file_path,
+                        *chunk[:2],
+                        self.fields,
+                        chunk[2],
+                    )
+                    await queue.put((index, games))
+                except BaseException:
+                    slots.release()
+                    raise
+
+            tasks = []
+            index = 0
+            while True:
+                await slots.acquire()
+                # Decompression blocks, keep it off the event loop
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    slots.release()
+                    break
+                ends[index] = chunk[1]
+                tasks.append(asyncio.create_task(parse(index, chunk)))
+                index += 1
+            await asyncio.gather(*tasks)
+            await queue.put(None)
+
+        async def consume():
+            nonlocal stored
+            parsed: Dict[int, List[Dict]] = {}
+            frontier = 0  # next chunk to store
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, games = item
+                parsed[index] = games
+
+                # Store strictly in file order so the checkpoint is exact;
+                # chunks parsed early wait here and keep their slot
+                while frontier in parsed:
+                    games = parsed.pop(frontier)
+                    if games:
+                        await store_games(games)
+                    stored += len(games)
+                    slots.release()
+                    checkpoint.save(ends[frontier], previously_stored + stored)
+                    frontier += 1
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            producer = asyncio.create_task(produce(executor))
+            consumer = asyncio.create_task(consume())
+            try:
+                # A failed parse must not leave the consumer waiting forever
+                done, _ = await asyncio.wait(
+                    {producer, consumer}, return_when=asyncio.FIRST_EXCEPTION
+                )
+                for task in done:
+                    task.result()
+                await asyncio.gather(producer, consumer)
+            finally:
+                producer.cancel()
+                consumer.cancel()
+
+        logger.info("PGN import finished", path=file_path, games=stored)
+        return stored
@@ -0,0 +1,149 @@
+"""Sidecar byte-offset index for random access into PGN archives.
+
+The index lives next to the archive (``games.pgn`` -> ``games.pgn.idx``) as an
+SQLite file mapping game number, players and date to the byte offset of each
+game. ``update`` only scans from the last indexed game on, so a game that was
+cut off mid-write is indexed again once it is complete; if the indexed part of
+the archive changed, the index is rebuilt.
+"""
+
+from typing import Iterable, List, Optional
+import hashlib
+import os
+import sqlite3
+import structlog
+
+from services.common.pgn_handler import PGNHandler
+
+logger = structlog.get_logger()
+
+TAIL_BYTES = 4096  # indexed bytes fingerprinted to detect rewrites
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    number INTEGER PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    white TEXT,
+    black TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_games_white ON games (white);
+CREATE INDEX IF NOT EXISTS idx_games_black ON games (black);
+CREATE INDEX IF NOT EXISTS idx_games_date ON games (date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _fingerprint(archive_path: str, size: int) -> str:
+    with open(archive_path, "rb") as archive:
+        archive.seek(max(size - TAIL_BYTES, 0))
+        return hashlib.sha1(archive.read(min(size, TAIL_BYTES))).hexdigest()
+
+
+class PGNIndex:
+    def __init__(self, archive_path: str, index_path: Optional[str] = None):
+        self.archive_path = archive_path
+        self.index_path = index_path or f"{archive_path}.idx"
+        self.db = sqlite3.connect(self.index_path)
+        self.db.executescript(SCHEMA)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def update(self) -> int:
+        """Index games appended since the last update; returns how many."""
+        size = os.path.getsize(self.archive_path)
+        indexed = int(self._meta("indexed_size") or 0)
+        scanned = int(self._meta("scanned_size") or indexed)
+        if indexed and (
+            size < scanned
+            or _fingerprint(self.archive_path, indexed) != self._meta("fingerprint")
+        ):
+            logger.info("PGN archive changed, rebuilding index", path=self.archive_path)
+            self.db.execute("DELETE FROM games")
+            indexed = scanned = 0
+        if size == scanned:
+            return 0
+
+        before = len(self)
+        # The last game may have been cut off while it was being written, so
+        # it is indexed again from its first tag on every update
+        self.db.execute("DELETE FROM games WHERE offset >= ?", (indexed,))
+        start = len(self)
+        last_game = indexed
+
+        def rows():
+            nonlocal last_game
+            for number, (offset, headers) in enumerate(
+                PGNHandler().scan_headers(self.archive_path, start=indexed)
+            ):
+                last_game = offset
+                yield (
+                    start + number,
+                    offset,
+                    headers.get("White"),
+                    headers.get("Black"),
+                    headers.get("Date"),
+                )
+
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO games (number, offset, white, black, date) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows(),
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ("indexed_size", str(last_game)),
+                    ("scanned_size", str(size)),
+                    ("fingerprint", _fingerprint(self.archive_path, last_game)),
+                ],
+            )
+        added = len(self) - before
+        logger.info("PGN index updated", path=self.archive_path, added=added)
+        return added
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def offsets(self, numbers: Iterable[int]) -> List[int]:
+        """Byte offsets of the given game numbers, in the order given."""
+        offsets = []
+        for number in numbers:
+            row = self.db.execute(
+                "SELECT offset FROM games WHERE number = ?", (number,)
+            ).fetchone()
+            if row is None:
+                raise IndexError(f"No game {number} in {self.archive_path}")
+            offsets.append(row[0])
+        return offsets
+
+    def find(
+        self,
+        player: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[int]:
+        """Offsets of games by ``player`` within an inclusive PGN date range."""
+        clauses, params = [], []
+        if player is not None:
+            clauses.append("(white = ? OR black = ?)")
+            params += [player, player]
+        if date_from is not None:
+            clauses.append("date >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append("date <= ?")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [
+            offset
+            for (offset,) in self.db.execute(
+                f"SELECT offset FROM games {where} ORDER BY number", params
+            )
+        ]
+
+    def close(self):
+        self.db.close()
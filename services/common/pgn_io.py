@@ -0,0 +1,56 @@
+"""Streaming readers for plain and compressed PGN archives.
+
+Compression is detected from the file's magic bytes, so ``.pgn.zst``,
+``.pgn.bz2`` and ``.pgn.gz`` archives are decompressed on the fly with
+bounded memory instead of being unpacked to disk first. zstd support needs
+the optional ``zstandard`` package.
+"""
+
+from typing import BinaryIO, Optional, TextIO
+import bz2
+import gzip
+import io
+
+READ_BUFFER = 1 << 20
+
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+
+def compression(file_path: str) -> Optional[str]:
+    """``gzip``, ``bz2``, ``zstd`` or ``None`` for plain text."""
+    with open(file_path, "rb") as handle:
+        head = handle.read(4)
+    for magic, name in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_binary(file_path: str) -> BinaryIO:
+    """Decompressed byte stream of a PGN archive."""
+    kind = compression(file_path)
+    if kind is None:
+        return open(file_path, "rb", buffering=READ_BUFFER)
+    if kind == "gzip":
+        return io.BufferedReader(gzip.open(file_path, "rb"), READ_BUFFER)
+    if kind == "bz2":
+        return io.BufferedReader(bz2.open(file_path, "rb"), READ_BUFFER)
+
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(f"Reading {file_path} requires the zstandard package")
+    # Lichess dumps are written with long-distance matching windows
+    decompressor = zstandard.ZstdDecompressor(max_window_size=1 << 31)
+    return io.BufferedReader(
+        decompressor.stream_reader(open(file_path, "rb"), closefd=True), READ_BUFFER
+    )
+
+
+def open_pgn(file_path: str) -> TextIO:
+    """Decompressed text stream suitable for ``chess.pgn.read_game``."""
+    return io.TextIOWrapper(open_binary(file_path), encoding="utf-8", errors="replace")
@@ -0,0 +1,89 @@
+"""64-bit Zobrist position keys shared by move analysis and caching.
+
+Keys are the Polyglot hash (``chess.polyglot.zobrist_hash``), so they ignore
+the move clocks and agree with the engine service's opening book. They are
+stored as signed integers to fit a Postgres ``BIGINT``.
+"""
+
+from typing import Iterable, List, Optional
+import chess
+import chess.polyglot
+
+_hasher = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+_array = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+
+
+def to_signed(key: int) -> int:
+    """Reinterpret an unsigned 64-bit key as a signed ``BIGINT``."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def position_key(board: chess.Board) -> int:
+    return to_signed(chess.polyglot.zobrist_hash(board))
+
+
+def fen_key(fen: str) -> int:
+    return position_key(chess.Board(fen))
+
+
+def _state_key(board: chess.Board) -> int:
+    """Castling, en passant and side-to-move part of the hash."""
+    return (
+        _hasher.hash_castling(board)
+        ^ _hasher.hash_ep_square(board)
+        ^ _hasher.hash_turn(board)
+    )
+
+
+def _piece_boards(board: chess.Board) -> List[int]:
+    """Bitboards in Polyglot piece order: (type - 1) * 2 + (1 if white else 0)."""
+    boards = []
+    for pieces in (
+        board.pawns,
+        board.knights,
+        board.bishops,
+        board.rooks,
+        board.queens,
+        board.kings,
+    ):
+        boards.append(pieces & board.occupied_co[chess.BLACK])
+        boards.append(pieces & board.occupied_co[chess.WHITE])
+    return boards
+
+
+class ZobristTracker:
+    """Keeps a position key up to date while a game is replayed.
+
+    Each push only rehashes the squares whose occupant changed plus the
+    castling, en passant and turn terms, instead of the whole board.
+    """
+
+    def __init__(self, board: Optional[chess.Board] = None):
+        self.board = board if board is not None else chess.Board()
+        self.raw = chess.polyglot.zobrist_hash(self.board)
+
+    @property
+    def key(self) -> int:
+        return to_signed(self.raw)
+
+    def push(self, move: chess.Move) -> int:
+        """Play ``move`` on the tracked board and return the new key."""
+        before = _piece_boards(self.board)
+        state = _state_key(self.board)
+        self.board.push(move)
+
+        raw = self.raw ^ state ^ _state_key(self.board)
+        for piece_index, (old, new) in enumerate(
+            zip(before, _piece_boards(self.board))
+        ):
+            for square in chess.scan_forward(old ^ new):
+                raw ^= _array[64 * piece_index + square]
+        self.raw = raw
+        return self.key
+
+    def replay(self, moves: Iterable[chess.Move]) -> List[int]:
+        """Keys of the current position and of every position after each move."""
+        keys = [self.key]
+        for move in moves:
+            keys.append(self.push(move))
+        return keys
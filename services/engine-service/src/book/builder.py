@@ -0,0 +1,108 @@
+"""Offline builder for the opening book.
+
+Run from the repository root so both the engine-service and common packages
+resolve::
+
+    PYTHONPATH=.:services/engine-service python -m src.book.builder \\
+        games.pgn book.bin --positions 100000 --depth 24
+"""
+
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+from collections import Counter
+import chess
+import chess.engine
+import structlog
+
+from services.common.pgn_handler import PGNHandler
+from src.book.store import BookEntry, entry_from_analysis, write_book
+from src.scaling.engine_pool import AdaptiveEnginePool, EngineConfig
+
+logger = structlog.get_logger()
+
+
+def count_positions(pgn_path: str, max_ply: int) -> List[Tuple[str, int]]:
+    """Count how often each position occurs in the first ``max_ply`` plies.
+
+    Returns ``(fen, occurrences)`` pairs, most frequent first.
+    """
+    counts: Counter = Counter()
+    fens: Dict[int, str] = {}
+
+    # FENs are lazy, so only the first occurrence of each position builds one
+    for game in PGNHandler().process_pgn_path(pgn_path, fields=("fen", "key")):
+        for move in game["moves"][:max_ply]:
+            key = move["key"]
+            counts[key] += 1
+            if key not in fens:
+                fens[key] = move["fen"]
+
+    return [(fens[key], count) for key, count in counts.most_common()]
+
+
+async def analyze_positions(
+    fens: List[str], depth: int, config: EngineConfig
+) -> List[BookEntry]:
+    pool = AdaptiveEnginePool(config)
+    await pool.initialize()
+    in_flight = asyncio.Semaphore(config.max_pool_size)
+
+    async def analyze(fen: str) -> Optional[BookEntry]:
+        board = chess.Board(fen)
+        try:
+            async with in_flight, pool.checkout() as engine:
+                info = await engine.analyse(board, chess.engine.Limit(depth=depth))
+            return entry_from_analysis(board, info)
+        except Exception as e:
+            # One failed position must not throw away the rest of the build
+            logger.error("Book position analysis failed", fen=fen, error=str(e))
+            return None
+
+    try:
+        entries = await asyncio.gather(*(analyze(fen) for fen in fens))
+    finally:
+        await pool.close()
+
+    analyzed = [entry for entry in entries if entry is not None]
+    if len(analyzed) < len(fens):
+        logger.warning("Skipped book positions", failed=len(fens) - len(analyzed))
+    return analyzed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book")
+    parser.add_argument("pgn", help="PGN corpus, optionally gz/bz2/zst compressed")
+    parser.add_argument("output", help="Path of the book file to write")
+    parser.add_argument("--positions", type=int, default=100000)
+    parser.add_argument("--depth", type=int, default=24)
+    parser.add_argument("--max-ply", type=int, default=30)
+    parser.add_argument("--min-occurrences", type=int, default=2)
+    parser.add_argument("--engine", default="stockfish")
+    parser.add_argument("--engines", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="Total threads")
+    parser.add_argument("--hash", type=int, default=4096, help="Total hash in MB")
+    args = parser.parse_args()
+
+    positions = count_positions(args.pgn, args.max_ply)
+    fens = [
+        fen
+        for fen, count in positions[: args.positions]
+        if count >= args.min_occurrences
+    ]
+    logger.info("Selected book positions", positions=len(fens))
+
+    config = EngineConfig.from_resources(
+        total_threads=args.threads,
+        total_hash=args.hash,
+        min_pool_size=args.engines,
+        max_pool_size=args.engines,
+        engine_path=args.engine,
+    )
+    entries = asyncio.run(analyze_positions(fens, args.depth, config))
+    write_book(args.output, entries)
+    logger.info("Opening book written", path=args.output, entries=len(entries))
+
+
+if __name__ == "__main__":
+    main()
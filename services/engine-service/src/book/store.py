@@ -0,0 +1,150 @@
+"""Memory-mapped opening book of precomputed engine analyses.
+
+File layout (little endian)::
+
+    header: magic "CABK", version u16, record size u16, record count u32
+    records sorted by key:
+        key u64          polyglot Zobrist hash of the position
+        depth u8         search depth of the stored analysis
+        pv_length u8     number of valid moves in ``pv``
+        score i16        centipawns from the side to move, mates as +-10000 - n
+        mate i8          moves to mate, 0 if none
+        (pad)
+        nodes u32        nodes the engine searched, saturated at 2**32 - 1
+        pv 5 * u16       principal variation as 16-bit moves
+"""
+
+from typing import Dict, Iterable, List, Optional
+import bisect
+import mmap
+import struct
+from dataclasses import dataclass
+import chess
+import chess.polyglot
+
+MAGIC = b"CABK"
+VERSION = 1
+MAX_PV = 5
+
+HEADER = struct.Struct("<4sHHI")
+RECORD = struct.Struct("<QBBhbxI5H")
+KEY = struct.Struct("<Q")
+
+
+def encode_move(move: chess.Move) -> int:
+    """Pack a move as from (6 bits) | to (6 bits) | promotion piece (3 bits)."""
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move(value: int) -> chess.Move:
+    promotion = value >> 12 & 0x7
+    return chess.Move(value & 0x3F, value >> 6 & 0x3F, promotion or None)
+
+
+@dataclass
+class BookEntry:
+    key: int
+    depth: int
+    score: int
+    mate: Optional[int]
+    nodes: int
+    pv: List[chess.Move]
+
+    def pack(self) -> bytes:
+        pv = [encode_move(move) for move in self.pv[:MAX_PV]]
+        return RECORD.pack(
+            self.key,
+            self.depth,
+            len(pv),
+            max(min(self.score, 32767), -32768),
+            max(min(self.mate or 0, 127), -128),
+            min(self.nodes, 0xFFFFFFFF),
+            *(pv + [0] * (MAX_PV - len(pv))),
+        )
+
+    @classmethod
+    def unpack_from(cls, buffer, offset: int) -> "BookEntry":
+        key, depth, pv_length, score, mate, nodes, *pv = RECORD.unpack_from(
+            buffer, offset
+        )
+        return cls(
+            key=key,
+            depth=depth,
+            score=score,
+            mate=mate or None,
+            nodes=nodes,
+            pv=[decode_move(value) for value in pv[:pv_length]],
+        )
+
+
+def write_book(path: str, entries: Iterable[BookEntry]):
+    """Write entries sorted by key, keeping the deepest one per position."""
+    deepest: Dict[int, BookEntry] = {}
+    for entry in entries:
+        current = deepest.get(entry.key)
+        if current is None or entry.depth > current.depth:
+            deepest[entry.key] = entry
+
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(deepest)))
+        for key in sorted(deepest):
+            book_file.write(deepest[key].pack())
+
+
+class _Keys:
+    """Sequence view of the record keys, so ``bisect`` can search the mmap."""
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self.buffer = buffer
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> int:
+        return KEY.unpack_from(self.buffer, HEADER.size + index * RECORD.size)[0]
+
+
+class OpeningBook:
+    def __init__(self, path: str):
+        with open(path, "rb") as book_file:
+            self.buffer = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+
+        self.keys = _Keys(self.buffer, count)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, board: chess.Board, depth: int = 0) -> Optional[BookEntry]:
+        """Return the stored analysis for ``board`` if it is at least ``depth``."""
+        key = chess.polyglot.zobrist_hash(board)
+        index = bisect.bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return None
+
+        entry = BookEntry.unpack_from(self.buffer, HEADER.size + index * RECORD.size)
+        # A colliding key would almost surely fail the legality check
+        if entry.depth < depth or (entry.pv and not board.is_legal(entry.pv[0])):
+            return None
+        return entry
+
+    def close(self):
+        self.buffer.close()
+
+
+def entry_from_analysis(board: chess.Board, info: Dict) -> BookEntry:
+    """Build a book entry from a single-PV python-chess analysis."""
+    score = info["score"].relative
+    return BookEntry(
+        key=chess.polyglot.zobrist_hash(board),
+        depth=info.get("depth", 0),
+        score=score.score(mate_score=10000),
+        mate=score.mate(),
+        nodes=info.get("nodes", 0),
+        pv=info.get("pv", [])[:MAX_PV],
+    )
@@ -0,0 +1,133 @@
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+import chess
+import chess.engine
+
+
+@dataclass
+class SearchBudget:
+    depth: int = 20  # nominal depth for an ordinary position
+    min_depth: int = 10  # never stop before this many iterations
+    extension: int = 4  # extra plies for critical or unstable positions
+    tolerance: float = 15.0  # centipawns the score may move between iterations
+    stable_iterations: int = 3  # iterations the best move must hold to stop early
+    forced_margin: float = 200.0  # centipawn gap that makes the best move forced
+    critical_complexity: float = 0.6  # ComplexityAnalyzer total_score threshold
+
+
+def _score(info: Dict) -> int:
+    return info["score"].relative.score(mate_score=10000)
+
+
+def _is_recapture(board: chess.Board, move: chess.Move) -> bool:
+    """Whether ``move`` takes back on the square the opponent just captured on."""
+    if not board.move_stack:
+        return False
+    last = board.peek()
+    return last.to_square == move.to_square and board.is_capture(move)
+
+
+class IterationMonitor:
+    """Decides after each completed iteration whether searching deeper pays off."""
+
+    def __init__(
+        self, board: chess.Board, budget: SearchBudget, complexity: Optional[float]
+    ):
+        self.board = board
+        self.budget = budget
+        self.critical = (
+            complexity is not None and complexity >= budget.critical_complexity
+        )
+        self.history: List[Tuple[chess.Move, int]] = []
+
+    @property
+    def max_depth(self) -> int:
+        return self.budget.depth + self.budget.extension
+
+    def stop_reason(self, depth: int, lines: List[Dict]) -> Optional[str]:
+        best = lines[0]
+        self.history.append((best["pv"][0], _score(best)))
+
+        if depth >= self.max_depth:
+            return "max_depth"
+        if depth < self.budget.min_depth:
+            return None
+
+        recent = self.history[-self.budget.stable_iterations :]
+        settled = len(recent) == self.budget.stable_iterations and all(
+            move == recent[-1][0]
+            and abs(score - recent[-1][1]) <= self.budget.tolerance
+            for move, score in recent
+        )
+
+        if settled and self._forced(lines):
+            return "forced"
+        if self.critical:
+            return None
+        if settled:
+            return "stable"
+        if depth >= self.budget.depth and self._steady():
+            return "nominal"
+        # Still swinging at the nominal depth: extend up to max_depth
+        return None
+
+    def _steady(self) -> bool:
+        if len(self.history) < 2:
+            return True
+        return abs(self.history[-1][1] - self.history[-2][1]) <= self.budget.tolerance
+
+    def _forced(self, lines: List[Dict]) -> bool:
+        best_move = lines[0]["pv"][0]
+        if _is_recapture(self.board, best_move):
+            return True
+        if len(lines) > 1 and "pv" in lines[1]:
+            return _score(lines[0]) - _score(lines[1]) >= self.budget.forced_margin
+        return False
+
+
+async def adaptive_analyse(
+    engine: chess.engine.Protocol,
+    board: chess.Board,
+    budget: SearchBudget,
+    multipv: int = 1,
+    complexity: Optional[float] = None,
+) -> Tuple[List[Dict], str]:
+    """Search iteratively and stop as soon as deeper search stops paying off.
+
+    Returns the multipv lines of the last completed iteration and the reason
+    the search stopped.
+    """
+    legal_moves = board.legal_moves.count()
+    if legal_moves == 1:
+        lines = await engine.analyse(
+            board, chess.engine.Limit(depth=budget.min_depth), multipv=1
+        )
+        return lines, "only_move"
+
+    monitor = IterationMonitor(board, budget, complexity)
+    current: Dict[int, Dict] = {}
+    lines: List[Dict] = []
+    reason = "exhausted"
+
+    with await engine.analysis(
+        board, chess.engine.Limit(depth=monitor.max_depth), multipv=multipv
+    ) as analysis:
+        async for info in analysis:
+            if "pv" not in info or "score" not in info:
+                continue
+            if info.get("lowerbound") or info.get("upperbound"):
+                # Aspiration window fail-high/low, not a finished iteration
+                continue
+            index = info.get("multipv", 1)
+            current[index] = info
+
+            # An iteration is complete once its last multipv line arrives
+            if index != min(multipv, legal_moves):
+                continue
+            lines = [current[i] for i in sorted(current)]
+            stop = monitor.stop_reason(info["depth"], lines)
+            if stop is not None:
+                reason = stop
+                break
+
+    return lines or [dict(line) for line in analysis.multipv], reason
@@ -1,27 +1,94 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 import chess.engine
 import asyncio
+from collections import OrderedDict, defaultdict
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from prometheus_client import Counter, Histogram
+
+SESSION_PLIES = Counter(
+    "engine_session_plies_total",
+    "Game plies analysed, by whether the engine already held the game",
+    ["warm"],
+)
+SESSION_NODES = Histogram(
+    "engine_session_nodes",
+    "Nodes searched per game ply",
+    ["depth", "warm"],
+    buckets=[10**k for k in range(3, 10)] + [float("inf")],
+)
+NODES_SAVED = Counter(
+    "engine_session_nodes_saved_total",
+    "Nodes saved on warm plies relative to the cold average at that depth",
+)
+HASHFULL = Histogram(
+    "engine_hashfull_permille",
+    "Transposition table occupancy reported after each game ply",
+    buckets=[50, 100, 250, 500, 750, 900, 1000],
+)
+SESSION_EVICTIONS = Counter(
+    "engine_session_evictions_total",
+    "Game sessions that lost their engine to another game",
+)
+
+
+@dataclass
+class GameSession:
+    game_id: str
+    engine: chess.engine.Protocol
+    board: chess.Board
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    warm: bool = False  # the engine has already searched a ply of this game
 
 
 class EngineManager:
     def __init__(self, engine_path: str = "stockfish"):
         self.engine_path = engine_path
-        self.engine_pool: List[chess.engine] = []
+        self.engine_pool: List[chess.engine.Protocol] = []
         self.pool_size = 3
+        self.engine_released = asyncio.Condition()
+
+        # Games pinned to an engine, least recently used first
+        self.sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self.cold_nodes: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+
+        # Metrics are shared by every manager in the process
+        self.session_plies = SESSION_PLIES
+        self.session_nodes = SESSION_NODES
+        self.nodes_saved = NODES_SAVED
+        self.hashfull = HASHFULL
+        self.session_evictions = SESSION_EVICTIONS
 
     async def initialize(self):
         for _ in range(self.pool_size):
-            engine = await chess.engine.popen_uci(self.engine_path)
+            _, engine = await chess.engine.popen_uci(self.engine_path)
+            self.engine_pool.append(engine)
+
+    async def _lease_engine(self) -> chess.engine.Protocol:
+        """Take a free engine, evicting the stalest idle game if needed."""
+        async with self.engine_released:
+            while True:
+                if self.engine_pool:
+                    return self.engine_pool.pop()
+                for session in self.sessions.values():
+                    if not session.lock.locked():
+                        self.session_evictions.inc()
+                        del self.sessions[session.game_id]
+                        return session.engine
+                await self.engine_released.wait()
+
+    async def _return_engine(self, engine: chess.engine.Protocol):
+        async with self.engine_released:
             self.engine_pool.append(engine)
+            self.engine_released.notify()
 
     @asynccontextmanager
     async def get_engine(self):
-        engine = self.engine_pool.pop()
+        engine = await self._lease_engine()
         try:
             yield engine
         finally:
-            self.engine_pool.append(engine)
+            await self._return_engine(engine)
 
     async def analyze_position(
         self, fen: str, depth: int = 20, multipv: int = 3
@@ -33,14 +100,108 @@ class EngineManager:
             )
             return self._process_analysis(result)
 
+    async def analyze_game_position(
+        self,
+        game_id: str,
+        moves: List[str],
+        depth: int = 20,
+        multipv: int = 3,
+        starting_fen: Optional[str] = None,
+    ) -> List[Dict]:
+        """Analyze the position after ``moves`` with the engine pinned to the game.
+
+        Every ply of a game goes to the same engine as ``position ... moves``
+        so its transposition table carries over; ``ucinewgame`` is only sent
+        when the engine switches to a different game.
+        """
+        while True:
+            session = await self._get_session(game_id, starting_fen)
+            async with session.lock:
+                if self.sessions.get(game_id) is not session:
+                    # The game was ended while we queued behind another ply
+                    continue
+                self._sync_board(session, moves, starting_fen)
+                result = await session.engine.analyse(
+                    session.board,
+                    chess.engine.Limit(depth=depth),
+                    multipv=multipv,
+                    game=game_id,
+                )
+                self._record_session_metrics(result[0], depth, session.warm)
+                session.warm = True
+                break
+
+        # The session is evictable again, wake anyone waiting for an engine
+        async with self.engine_released:
+            self.engine_released.notify()
+        return self._process_analysis(result)
+
+    async def end_game(self, game_id: str):
+        """Unpin a finished game and return its engine to the pool."""
+        session = self.sessions.pop(game_id, None)
+        if session is None:
+            return
+        async with session.lock:
+            await self._return_engine(session.engine)
+
+    async def _get_session(
+        self, game_id: str, starting_fen: Optional[str]
+    ) -> GameSession:
+        session = self.sessions.get(game_id)
+        if session is not None:
+            self.sessions.move_to_end(game_id)
+            return session
+
+        engine = await self._lease_engine()
+        if game_id in self.sessions:
+            # Another request for this game won the race for an engine
+            await self._return_engine(engine)
+            return self.sessions[game_id]
+
+        board = chess.Board(starting_fen) if starting_fen else chess.Board()
+        session = GameSession(game_id=game_id, engine=engine, board=board)
+        self.sessions[game_id] = session
+        return session
+
+    @staticmethod
+    def _sync_board(
+        session: GameSession, moves: List[str], starting_fen: Optional[str]
+    ):
+        """Advance the session board to ``moves``, replaying only new plies."""
+        played = [move.uci() for move in session.board.move_stack]
+        if played != moves[: len(played)]:
+            # Takeback or a different line; start again from the root
+            session.board = chess.Board(starting_fen) if starting_fen else chess.Board()
+            played = []
+
+        for uci in moves[len(played) :]:
+            session.board.push_uci(uci)
+
+    def _record_session_metrics(self, info: Dict, depth: int, warm: bool):
+        nodes = info.get("nodes")
+        if nodes is not None:
+            self.session_plies.labels(warm=str(warm).lower()).inc()
+            self.session_nodes.labels(depth=depth, warm=str(warm).lower()).observe(
+                nodes
+            )
+            cold_total = self.cold_nodes[depth]
+            if not warm:
+                cold_total[0] += nodes
+                cold_total[1] += 1
+            elif cold_total[1]:
+                self.nodes_saved.inc(max(cold_total[0] / cold_total[1] - nodes, 0))
+
+        if info.get("hashfull") is not None:
+            self.hashfull.observe(info["hashfull"])
+
     @staticmethod
     def _process_analysis(analysis_result) -> List[Dict]:
         return [
             {
-                "move": pv.moves[0].uci(),
-                "score": pv.score.relative.score(mate_score=10000),
-                "depth": pv.depth,
-                "pv": [move.uci() for move in pv.moves[:3]],
+                "move": pv["pv"][0].uci(),
+                "score": pv["score"].relative.score(mate_score=10000),
+                "depth": pv["depth"],
+                "pv": [move.uci() for move in pv["pv"][:3]],
             }
             for pv in analysis_result
         ]
@@ -1,20 +1,78 @@
+import asyncio
+import io
+import json
 import os
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import chess.engine
-from typing import List, Optional, Dict
+import chess.pgn
+from typing import AsyncIterator, List, Optional, Dict, Tuple
 import structlog
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from contextlib import asynccontextmanager
 
+from src.book.store import OpeningBook
+from src.budget import SearchBudget, adaptive_analyse
+from src.scaling.engine_pool import (
+    AdaptiveEnginePool,
+    EngineConfig,
+    PoolExhaustedError,
+)
+
 # Configure logging
 logger = structlog.get_logger()
 
+# End-to-end (checkout + search) p99 latency we want to hold per request
+ANALYSIS_P99_TARGET = float(os.getenv("ANALYSIS_P99_TARGET", 2.0))
+
+
+def latency_buckets(target: float) -> List[float]:
+    """Histogram buckets clustered around the latency target."""
+    factors = [0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0, 1.1, 1.25, 1.5, 2.0, 4.0, 8.0]
+    return [round(target * factor, 4) for factor in factors] + [float("inf")]
+
+
 # Configure metrics
 ANALYSIS_DURATION = Histogram(
-    "engine_analysis_duration_seconds", "Time spent on position analysis", ["depth"]
+    "engine_analysis_duration_seconds",
+    "Time spent on position analysis",
+    ["depth"],
+    buckets=latency_buckets(ANALYSIS_P99_TARGET),
+)
+ANALYSIS_LATENCY_TARGET = Gauge(
+    "engine_analysis_p99_target_seconds", "Target p99 position analysis latency"
 )
 ENGINE_ERRORS = Counter("engine_errors_total", "Total number of engine errors")
+ENGINE_SECONDS = Counter(
+    "engine_search_seconds_total", "Engine time spent searching", ["mode"]
+)
+ADAPTIVE_STOPS = Counter(
+    "engine_adaptive_stops_total", "Why adaptive searches stopped", ["reason"]
+)
+BOOK_LOOKUPS = Counter(
+    "opening_book_lookups_total", "Opening book lookups by outcome", ["result"]
+)
+
+
+def build_pool_config() -> EngineConfig:
+    """Size the engine pool from the node's cores and hash budget."""
+    total_threads = int(os.getenv("ENGINE_TOTAL_THREADS", os.cpu_count() or 1))
+    threads_per_engine = int(os.getenv("ENGINE_THREADS", 2))
+    pool_size = int(
+        os.getenv("ENGINE_POOL_SIZE", max(1, total_threads // threads_per_engine))
+    )
+
+    return EngineConfig.from_resources(
+        total_threads=total_threads,
+        total_hash=int(os.getenv("MAX_HASH_SIZE", 1024)),
+        min_pool_size=int(os.getenv("ENGINE_POOL_MIN", 1)),
+        max_pool_size=pool_size,
+        engine_path=os.getenv("STOCKFISH_PATH", "/usr/local/bin/stockfish"),
+        acquire_timeout=float(os.getenv("ENGINE_ACQUIRE_TIMEOUT", 30.0)),
+        max_waiters=int(os.getenv("ENGINE_MAX_WAITERS", 256)),
+        idle_timeout=int(os.getenv("ENGINE_IDLE_TIMEOUT", 300)),
+    )
 
 
 class AnalysisRequest(BaseModel):
@@ -22,6 +80,11 @@ class AnalysisRequest(BaseModel):
     depth: Optional[int] = 20
     multipv: Optional[int] = 1
     time_limit: Optional[float] = None
+    priority: int = 1  # 0 is served first
+    queue_timeout: Optional[float] = None  # seconds to wait for an engine
+    adaptive: bool = False  # let the search stop early or extend around depth
+    complexity: Optional[float] = None  # ComplexityAnalyzer total_score
+    tolerance: Optional[float] = None  # centipawns, overrides the default
 
 
 class AnalysisResponse(BaseModel):
@@ -32,6 +95,19 @@ class AnalysisResponse(BaseModel):
     score: float
 
 
+class BatchAnalysisRequest(BaseModel):
+    fen: Optional[str] = None  # starting position, standard start if omitted
+    moves: Optional[List[str]] = None  # UCI moves played from ``fen``
+    pgn: Optional[str] = None  # alternative to fen + moves
+    depth: Optional[int] = 20
+    multipv: Optional[int] = 1
+    time_limit: Optional[float] = None
+    priority: int = 2  # batch work yields to single-position requests
+    adaptive: bool = False
+    complexity: Optional[List[float]] = None  # per ply, aligned with positions
+    tolerance: Optional[float] = None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialization
@@ -40,45 +116,201 @@ async def lifespan(app: FastAPI):
         # Start Prometheus metrics server
         start_http_server(8000)
 
-        # Initialize the Stockfish engine
-        transport, engine = await chess.engine.popen_uci("/usr/local/bin/stockfish")
-        await engine.configure(
-            {
-                "Threads": int(os.getenv("ENGINE_THREADS", 2)),
-                "Hash": int(os.getenv("MAX_HASH_SIZE", 1024)),
-            }
-        )
+        ANALYSIS_LATENCY_TARGET.set(ANALYSIS_P99_TARGET)
+
+        # Initialize the Stockfish engine pool
+        config = build_pool_config()
+        app.state.engine_pool = AdaptiveEnginePool(config)
+        await app.state.engine_pool.initialize()
+
+        # Precomputed analyses for common opening positions
+        book_path = os.getenv("OPENING_BOOK_PATH")
+        app.state.book = OpeningBook(book_path) if book_path else None
 
-        app.state.engine = engine
-        logger.info("Engine and metrics server initialized")
+        logger.info(
+            "Engine pool and metrics server initialized",
+            book_entries=len(app.state.book) if app.state.book else 0,
+            engines=len(app.state.engine_pool.engines),
+            threads_per_engine=config.threads_per_engine,
+            hash_per_engine=config.hash_per_engine,
+        )
         yield
     except Exception as e:
         logger.error("Error during initialization", error=str(e))
         raise
     finally:
         # Cleanup
-        if app.state.engine:
-            await app.state.engine.quit()
-            logger.info("Engine shut down")
+        if getattr(app.state, "engine_pool", None):
+            await app.state.engine_pool.close()
+            logger.info("Engine pool shut down")
+        if getattr(app.state, "book", None):
+            app.state.book.close()
 
 
 # Initialize FastAPI application with lifespan
 app = FastAPI(title="Chess Engine Service", lifespan=lifespan)
 
 
+def process_analysis(results: List[Dict]) -> Dict:
+    """Convert multipv engine output into the response payload."""
+    moves = []
+    for result in results:
+        moves.append(
+            {
+                "move": result.get("pv")[0].uci(),
+                "score": result.get("score").relative.score(mate_score=10000),
+                "mate": result.get("score").relative.mate(),
+                "pv": [move.uci() for move in result.get("pv")[:5]],
+            }
+        )
+
+    return {
+        "moves": moves,
+        "depth": results[0]["depth"],  # Does this value change on multipv
+        "time": results[0]["time"],  # Does this value change on multipv
+        "nodes": results[0]["nodes"],  # Does this value change on multipv
+        "score": moves[0]["score"],
+    }
+
+
+def build_budget(depth: Optional[int], tolerance: Optional[float]) -> SearchBudget:
+    """Adaptive search budget around the requested depth.
+
+    Adaptive search needs a target depth, so requests without one get
+    ``ADAPTIVE_DEPTH``.
+    """
+    if depth is None:
+        depth = int(os.getenv("ADAPTIVE_DEPTH", 20))
+    return SearchBudget(
+        depth=depth,
+        min_depth=min(int(os.getenv("ADAPTIVE_MIN_DEPTH", 10)), depth),
+        extension=int(os.getenv("ADAPTIVE_EXTENSION", 4)),
+        tolerance=(
+            tolerance
+            if tolerance is not None
+            else float(os.getenv("ADAPTIVE_TOLERANCE_CP", 15))
+        ),
+    )
+
+
+async def run_search(
+    engine: chess.engine.Protocol,
+    board: chess.Board,
+    request: BaseModel,
+    complexity: Optional[float] = None,
+) -> List[Dict]:
+    """Run a fixed-depth or adaptive search and account for its engine time."""
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+
+    if request.adaptive and request.time_limit is None:
+        results, reason = await adaptive_analyse(
+            engine,
+            board,
+            build_budget(request.depth, request.tolerance),
+            multipv=request.multipv,
+            complexity=complexity,
+        )
+        ADAPTIVE_STOPS.labels(reason=reason).inc()
+        mode = "adaptive"
+    else:
+        results = await engine.analyse(
+            board,
+            chess.engine.Limit(depth=request.depth, time=request.time_limit),
+            multipv=request.multipv,
+        )
+        mode = "fixed"
+
+    ENGINE_SECONDS.labels(mode=mode).inc(loop.time() - start_time)
+    return results
+
+
+def book_analysis(
+    board: chess.Board,
+    depth: Optional[int],
+    multipv: int,
+    time_limit: Optional[float],
+) -> Optional[Dict]:
+    """Answer from the opening book when it holds a deep enough analysis."""
+    book = getattr(app.state, "book", None)
+    if book is None or depth is None or multipv != 1 or time_limit is not None:
+        return None
+
+    entry = book.get(board, depth)
+    if entry is None or not entry.pv:
+        BOOK_LOOKUPS.labels(result="miss").inc()
+        return None
+    BOOK_LOOKUPS.labels(result="hit").inc()
+
+    return {
+        "moves": [
+            {
+                "move": entry.pv[0].uci(),
+                "score": entry.score,
+                "mate": entry.mate,
+                "pv": [move.uci() for move in entry.pv],
+            }
+        ],
+        "depth": entry.depth,
+        "time": 0.0,
+        "nodes": entry.nodes,
+        "score": entry.score,
+    }
+
+
+def replay_game(
+    request: BatchAnalysisRequest,
+) -> List[Tuple[int, chess.Board, Optional[str]]]:
+    """Replay the game once and snapshot every position worth analysing.
+
+    Returns ``(ply, board, move played from it)`` for each position that
+    still has legal moves.
+    """
+    if request.pgn:
+        game = chess.pgn.read_game(io.StringIO(request.pgn))
+        if game is None or game.errors:
+            raise ValueError("Invalid PGN")
+        board = game.board()
+        moves = list(game.mainline_moves())
+    else:
+        board = chess.Board(request.fen) if request.fen else chess.Board()
+        moves = [chess.Move.from_uci(uci) for uci in request.moves or []]
+
+    positions = []
+    for ply, move in enumerate(moves + [None]):
+        if board.legal_moves:
+            positions.append(
+                # Keep the last move so adaptive search can spot recaptures
+                (ply, board.copy(stack=1), move.uci() if move else None)
+            )
+        if move is None:
+            break
+        if not board.is_legal(move):
+            raise ValueError(f"Illegal move {move.uci()} at ply {ply}")
+        board.push(move)
+
+    return positions
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    if not getattr(app.state, "engine", None):
+    pool = getattr(app.state, "engine_pool", None)
+    if not pool or not pool.engines:
         raise HTTPException(status_code=503, detail="Engine not initialized")
-    return {"status": "healthy"}
+    book = getattr(app.state, "book", None)
+    return {
+        "status": "healthy",
+        "engines": len(pool.engines),
+        "book_entries": len(book) if book else 0,
+    }
 
 
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze_position(request: AnalysisRequest):
     """Analyze a chess position."""
-    engine = getattr(app.state, "engine", None)
-    if not engine:
+    pool = getattr(app.state, "engine_pool", None)
+    if not pool:
         raise HTTPException(status_code=503, detail="Engine not initialized")
 
     try:
@@ -87,38 +319,91 @@ async def analyze_position(request: AnalysisRequest):
         raise HTTPException(status_code=400, detail="Invalid FEN string")
 
     try:
-        with ANALYSIS_DURATION.labels(depth=request.depth).time():
-            results = await engine.analyse(
-                board,
-                chess.engine.Limit(depth=request.depth, time=request.time_limit),
-                multipv=request.multipv,
-            )
+        booked = book_analysis(
+            board, request.depth, request.multipv, request.time_limit
+        )
+        if booked is not None:
+            return AnalysisResponse(**booked)
 
-        # Process analysis results
-        moves = []
-        for result in results:
-            moves.append(
-                {
-                    "move": result.get("pv")[0].uci(),
-                    "score": result.get("score").relative.score(mate_score=10000),
-                    "mate": result.get("score").relative.mate(),
-                    "pv": [move.uci() for move in result.get("pv")[:5]],
-                }
-            )
+        with ANALYSIS_DURATION.labels(depth=request.depth).time():
+            async with pool.checkout(
+                timeout=request.queue_timeout, priority=request.priority
+            ) as engine:
+                results = await run_search(
+                    engine, board, request, complexity=request.complexity
+                )
 
-        return AnalysisResponse(
-            moves=moves,
-            depth=results[0]["depth"],  # Does this value change on multipv
-            time=results[0]["time"],  # Does this value change on multipv
-            nodes=results[0]["nodes"],  # Does this value change on multipv
-            score=moves[0]["score"],
-        )
+        return AnalysisResponse(**process_analysis(results))
+    except PoolExhaustedError as e:
+        logger.warning("Engine pool saturated", error=str(e))
+        raise HTTPException(status_code=503, detail="Engine pool saturated")
     except Exception as e:
         ENGINE_ERRORS.inc()
         logger.error("Analysis failed", error=str(e))
         raise HTTPException(status_code=500, detail="Analysis failed")
 
 
+@app.post("/analyze_batch")
+async def analyze_batch(request: BatchAnalysisRequest):
+    """Analyze every position of a game, streaming NDJSON as plies finish.
+
+    Lines arrive in completion order, not ply order; each carries its ``ply``.
+    """
+    pool = getattr(app.state, "engine_pool", None)
+    if not pool:
+        raise HTTPException(status_code=503, detail="Engine not initialized")
+
+    try:
+        positions = replay_game(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Keep one batch from flooding the shared wait queue
+    in_flight = asyncio.Semaphore(pool.config.max_pool_size)
+
+    async def analyze_ply(ply: int, board: chess.Board, move: Optional[str]) -> Dict:
+        line = {"ply": ply, "fen": board.fen(), "played": move}
+        complexity = (
+            request.complexity[ply]
+            if request.complexity and ply < len(request.complexity)
+            else None
+        )
+        try:
+            booked = book_analysis(
+                board, request.depth, request.multipv, request.time_limit
+            )
+            if booked is not None:
+                line.update(booked)
+                return line
+
+            async with in_flight:
+                with ANALYSIS_DURATION.labels(depth=request.depth).time():
+                    async with pool.checkout(priority=request.priority) as engine:
+                        results = await run_search(
+                            engine, board, request, complexity=complexity
+                        )
+            line.update(process_analysis(results))
+        except PoolExhaustedError:
+            line["error"] = "Engine pool saturated"
+        except Exception as e:
+            ENGINE_ERRORS.inc()
+            logger.error("Batch analysis failed", ply=ply, error=str(e))
+            line["error"] = "Analysis failed"
+        return line
+
+    async def stream() -> AsyncIterator[str]:
+        tasks = [asyncio.create_task(analyze_ply(*position)) for position in positions]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # Client went away or we are done; don't leave plies queued
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 if __name__ == "__main__":
     import uvicorn
 
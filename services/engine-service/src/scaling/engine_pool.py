@@ -1,9 +1,36 @@
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
 import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 import chess.engine
+import structlog
 from prometheus_client import Counter, Gauge, Histogram
 
+logger = structlog.get_logger()
+
+POOL_SIZE = Gauge("engine_pool_size", "Current number of engines")
+ENGINE_WAIT_TIME = Histogram(
+    "engine_wait_seconds", "Time waiting for engine availability"
+)
+ANALYSIS_QUEUE_SIZE = Gauge("analysis_queue_size", "Current analysis queue size")
+CHECKOUT_REJECTIONS = Counter(
+    "engine_checkout_rejections_total",
+    "Checkouts rejected because the pool was saturated",
+    ["reason"],
+)
+SPAWN_LATENCY = Histogram(
+    "engine_spawn_seconds", "Time to start and configure an engine"
+)
+RECYCLED_ENGINES = Counter(
+    "engines_recycled_total", "Engines removed from the pool", ["reason"]
+)
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no engine could be checked out within the configured bounds."""
+
 
 @dataclass
 class EngineConfig:
@@ -12,75 +39,327 @@ class EngineConfig:
     scaling_threshold: float = 0.8
     cooldown_period: int = 60  # seconds
     engine_path: str = "stockfish"
+    threads_per_engine: int = 1
+    hash_per_engine: int = 128  # MB
+    acquire_timeout: float = 30.0  # seconds
+    max_waiters: int = 256
+    priority_levels: int = 3
+    idle_timeout: int = 300  # seconds before an idle engine may be retired
+    health_check_interval: float = 15.0  # seconds
+    ping_timeout: float = 5.0  # seconds to answer an isready probe
+
+    @classmethod
+    def from_resources(
+        cls, total_threads: int, total_hash: int, **kwargs
+    ) -> "EngineConfig":
+        """Partition the node's cores and hash memory across the pool.
+
+        Resources are split by ``max_pool_size`` so a fully scaled pool never
+        oversubscribes the node.
+        """
+        config = cls(**kwargs)
+        config.threads_per_engine = max(1, total_threads // config.max_pool_size)
+        config.hash_per_engine = max(16, total_hash // config.max_pool_size)
+        return config
 
 
 class AdaptiveEnginePool:
     def __init__(self, config: EngineConfig):
         self.config = config
-        self.engines: List[chess.engine.SimpleEngine] = []
+        self.engines: Dict[str, chess.engine.Protocol] = {}
+        self.transports: Dict[str, asyncio.SubprocessTransport] = {}
         self.active_engines: Dict[str, bool] = {}
+        self.idle_engines: Deque[str] = deque()
+        self.idle_since: Dict[str, float] = {}
+        self.waiters: List[Deque[asyncio.Future]] = [
+            deque() for _ in range(config.priority_levels)
+        ]
+        self.engine_ids = itertools.count()
         self.last_scale_time = 0
+        self.pending_spawns = 0
+        self.background_tasks: Set[asyncio.Task] = set()
+        self.closing = False
 
-        # Metrics
-        self.pool_size = Gauge("engine_pool_size", "Current number of engines")
-        self.engine_wait_time = Histogram(
-            "engine_wait_seconds", "Time waiting for engine availability"
-        )
-        self.analysis_queue_size = Gauge(
-            "analysis_queue_size", "Current analysis queue size"
-        )
+        # Metrics are shared by every pool in the process
+        self.pool_size = POOL_SIZE
+        self.engine_wait_time = ENGINE_WAIT_TIME
+        self.analysis_queue_size = ANALYSIS_QUEUE_SIZE
+        self.checkout_rejections = CHECKOUT_REJECTIONS
+        self.spawn_latency = SPAWN_LATENCY
+        self.recycled_engines = RECYCLED_ENGINES
 
     async def initialize(self):
-        """Initialize the engine pool."""
+        """Initialize the engine pool and start background maintenance."""
         for _ in range(self.config.min_pool_size):
             await self.add_engine()
+        self._spawn_task(self.maintain())
 
     async def add_engine(self):
         """Add a new engine to the pool."""
-        engine = await chess.engine.SimpleEngine.popen_uci(self.config.engine_path)
-        engine_id = f"engine_{len(self.engines)}"
-        self.engines.append(engine)
-        self.active_engines[engine_id] = False
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        self.pending_spawns += 1
+        try:
+            transport, engine = await chess.engine.popen_uci(self.config.engine_path)
+            await engine.configure(
+                {
+                    "Threads": self.config.threads_per_engine,
+                    "Hash": self.config.hash_per_engine,
+                }
+            )
+        finally:
+            self.pending_spawns -= 1
+        self.spawn_latency.observe(loop.time() - start_time)
+
+        # Ids are never reused, so removing an engine can't shift the others
+        engine_id = f"engine_{next(self.engine_ids)}"
+        self.engines[engine_id] = engine
+        self.transports[engine_id] = transport
         self.pool_size.inc()
 
-    async def get_engine(self) -> tuple[str, chess.engine.SimpleEngine]:
-        """Get an available engine from the pool."""
-        start_time = asyncio.get_event_loop().time()
+        # A fresh engine goes to whoever has been waiting longest
+        self.release_engine(engine_id)
 
-        while True:
-            # Find available engine
-            for engine_id, active in self.active_engines.items():
-                if not active:
-                    self.active_engines[engine_id] = True
-                    wait_time = asyncio.get_event_loop().time() - start_time
-                    self.engine_wait_time.observe(wait_time)
-                    return engine_id, self.engines[int(engine_id.split("_")[1])]
+    async def remove_engine(self, engine_id: str):
+        """Take an engine out of the pool and stop its process."""
+        engine = self.engines.pop(engine_id, None)
+        transport = self.transports.pop(engine_id, None)
+        self.active_engines.pop(engine_id, None)
+        self.idle_since.pop(engine_id, None)
+        if engine_id in self.idle_engines:
+            self.idle_engines.remove(engine_id)
+        if engine is None:
+            return
+        self.pool_size.dec()
+
+        try:
+            await asyncio.wait_for(engine.quit(), self.config.ping_timeout)
+        except (asyncio.TimeoutError, chess.engine.EngineError):
+            # Hung or already dead, make sure the process goes away
+            if transport is not None:
+                transport.kill()
+                transport.close()
+
+    async def recycle_engine(self, engine_id: str, reason: str):
+        """Replace a crashed or unresponsive engine with a fresh process."""
+        logger.warning("Recycling engine", engine_id=engine_id, reason=reason)
+        self.recycled_engines.labels(reason=reason).inc()
+        await self.remove_engine(engine_id)
+        try:
+            await self.add_engine()
+        except (OSError, chess.engine.EngineError) as e:
+            logger.error("Failed to respawn engine", error=str(e))
+
+    async def get_engine(
+        self, timeout: Optional[float] = None, priority: int = 1
+    ) -> tuple[str, chess.engine.Protocol]:
+        """Get an available engine from the pool.
+
+        Waiters are served first-come first-served within a priority lane and
+        lane 0 is always served first. ``timeout`` is the request's deadline
+        for getting an engine (``acquire_timeout`` by default).
+        """
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        # Fast path: only take an idle engine if nobody is queued ahead of us.
+        # The most recently used engine is preferred so the rest can go idle.
+        if self.idle_engines and not self.queued_waiters:
+            engine_id = self.idle_engines.pop()
+            self.active_engines[engine_id] = True
+            self.engine_wait_time.observe(0.0)
+            return engine_id, self.engines[engine_id]
+
+        if self.queued_waiters >= self.config.max_waiters:
+            self.checkout_rejections.labels(reason="queue_full").inc()
+            raise PoolExhaustedError("Engine wait queue is full")
 
-            # Check if we should scale up
-            if self.should_scale_up():
-                await self.scale_up()
+        priority = min(max(priority, 0), self.config.priority_levels - 1)
+        waiter: asyncio.Future = loop.create_future()
+        self.waiters[priority].append(waiter)
+        self.analysis_queue_size.inc()
 
-            await asyncio.sleep(0.1)
+        # Check if we should scale up
+        if self.should_scale_up():
+            self.last_scale_time = loop.time()
+            self._spawn_task(self.add_engine())
+
+        timeout = self.config.acquire_timeout if timeout is None else timeout
+        try:
+            engine_id = await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # An engine was handed over while we were giving up
+                self.release_engine(waiter.result())
+            else:
+                waiter.cancel()
+                self._discard_waiter(priority, waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.checkout_rejections.labels(reason="timeout").inc()
+            raise PoolExhaustedError(f"No engine available within {timeout}s")
+
+        self.engine_wait_time.observe(loop.time() - start_time)
+        return engine_id, self.engines[engine_id]
 
     def release_engine(self, engine_id: str):
-        """Release an engine back to the pool."""
+        """Release an engine back to the pool.
+
+        The engine is handed directly to the oldest waiter of the highest
+        priority lane, so it never becomes visible as idle in between.
+        """
+        if engine_id not in self.engines:
+            return
+
+        for lane in self.waiters:
+            while lane:
+                waiter = lane.popleft()
+                if waiter.done():
+                    continue
+                self.analysis_queue_size.dec()
+                self.active_engines[engine_id] = True
+                waiter.set_result(engine_id)
+                return
+
         self.active_engines[engine_id] = False
+        self.idle_engines.append(engine_id)
+        self.idle_since[engine_id] = asyncio.get_event_loop().time()
+
+    @property
+    def queued_waiters(self) -> int:
+        return sum(len(lane) for lane in self.waiters)
+
+    def _discard_waiter(self, priority: int, waiter: asyncio.Future):
+        try:
+            self.waiters[priority].remove(waiter)
+        except ValueError:
+            return
+        self.analysis_queue_size.dec()
+
+    def _spawn_task(self, coro) -> asyncio.Task:
+        # Keep a reference so fire-and-forget tasks aren't garbage collected
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    @asynccontextmanager
+    async def checkout(
+        self, timeout: Optional[float] = None, priority: int = 1
+    ) -> AsyncIterator[chess.engine.Protocol]:
+        """Check out an engine for the duration of the block."""
+        engine_id, engine = await self.get_engine(timeout, priority)
+        try:
+            yield engine
+        finally:
+            if engine.returncode.done():
+                self._spawn_task(self.recycle_engine(engine_id, reason="crashed"))
+            else:
+                self.release_engine(engine_id)
 
     def should_scale_up(self) -> bool:
         """Determine if we should scale up the engine pool."""
         current_time = asyncio.get_event_loop().time()
         if current_time - self.last_scale_time < self.config.cooldown_period:
             return False
+        if not self.engines:
+            return False
 
         active_count = sum(1 for active in self.active_engines.values() if active)
         utilization = active_count / len(self.engines)
 
         return (
             utilization > self.config.scaling_threshold
-            and len(self.engines) < self.config.max_pool_size
+            and len(self.engines) + self.pending_spawns < self.config.max_pool_size
         )
 
     async def scale_up(self):
         """Scale up the engine pool."""
         self.last_scale_time = asyncio.get_event_loop().time()
         await self.add_engine()
+
+    async def scale_down(self):
+        """Retire engines that have been idle longer than ``idle_timeout``."""
+        now = asyncio.get_event_loop().time()
+        # The fast path reuses the most recent engine, so the head of
+        # idle_engines is the one that has been idle longest
+        while self.idle_engines and len(self.engines) > self.config.min_pool_size:
+            engine_id = self.idle_engines[0]
+            if now - self.idle_since.get(engine_id, now) < self.config.idle_timeout:
+                break
+            self.recycled_engines.labels(reason="idle").inc()
+            await self.remove_engine(engine_id)
+
+    async def check_health(self):
+        """Probe idle engines with ``isready`` and replace dead or hung ones.
+
+        An engine is checked out while it is probed, so a request can't be
+        handed an engine that is still answering the probe.
+        """
+        for engine_id in list(self.idle_engines):
+            if engine_id not in self.idle_engines:
+                # Checked out or retired while an earlier engine was probed
+                continue
+            self.idle_engines.remove(engine_id)
+            self.active_engines[engine_id] = True
+            idle_since = self.idle_since.pop(engine_id, None)
+            engine = self.engines[engine_id]
+
+            if engine.returncode.done():
+                await self.recycle_engine(engine_id, reason="crashed")
+                continue
+            try:
+                await asyncio.wait_for(engine.ping(), self.config.ping_timeout)
+            except (asyncio.TimeoutError, chess.engine.EngineError):
+                await self.recycle_engine(engine_id, reason="unresponsive")
+                continue
+            self._return_probed(engine_id, idle_since)
+
+    def _return_probed(self, engine_id: str, idle_since: Optional[float]):
+        """Release a probed engine without resetting its idle time."""
+        self.release_engine(engine_id)
+        if self.active_engines.get(engine_id) or idle_since is None:
+            return
+        # A probe isn't use: keep the idle order scale_down relies on
+        self.idle_engines.remove(engine_id)
+        position = sum(
+            1
+            for other in self.idle_engines
+            if self.idle_since.get(other, idle_since) <= idle_since
+        )
+        self.idle_engines.insert(position, engine_id)
+        self.idle_since[engine_id] = idle_since
+
+    async def maintain(self):
+        """Periodically health-check the pool and shrink it when idle."""
+        while True:
+            await asyncio.sleep(self.config.health_check_interval)
+            try:
+                await self.check_health()
+                await self.scale_down()
+                if len(self.engines) < self.config.min_pool_size:
+                    await self.add_engine()
+            except asyncio.CancelledError:
+                # Python < 3.11 can't tell a cancelled task from a leaked error
+                cancelling = getattr(asyncio.current_task(), "cancelling", None)
+                if cancelling() if cancelling else self.closing:
+                    raise
+                # Leaked out of an engine command; keep maintaining the pool
+                logger.error("Engine pool maintenance interrupted")
+            except Exception as e:
+                logger.error("Engine pool maintenance failed", error=str(e))
+
+    async def close(self):
+        """Shut down every engine in the pool."""
+        self.closing = True
+        for task in list(self.background_tasks):
+            task.cancel()
+        for lane in self.waiters:
+            for waiter in lane:
+                waiter.cancel()
+            lane.clear()
+        for engine_id in list(self.engines):
+            await self.remove_engine(engine_id)
+        self.analysis_queue_size.set(0)
+        self.pool_size.set(0)
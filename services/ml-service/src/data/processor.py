@@ -1,4 +1,6 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import os
 import torch
 import numpy as np
 from torch.utils.data import Dataset
@@ -25,6 +27,9 @@ class ChessDataset(Dataset):
         self.max_sequence_length = max_sequence_length
         self.tokenizer = tokenizer or self._create_default_tokenizer()
 
+    def _create_default_tokenizer(self) -> "MoveTokenizer":
+        return MoveTokenizer()
+
     def __len__(self) -> int:
         return len(self.games)
 
@@ -56,3 +61,140 @@ class ChessDataset(Dataset):
         if len(sequence) > self.max_sequence_length:
             return sequence[: self.max_sequence_length]
         return sequence + [0] * (self.max_sequence_length - len(sequence))
+
+    def _create_attention_mask(self, length: int) -> List[int]:
+        """1 for real moves, 0 for padding."""
+        length = min(length, self.max_sequence_length)
+        return [1] * length + [0] * (self.max_sequence_length - length)
+
+
+class MoveTokenizer:
+    """Maps UCI moves to ids below ``ModelConfig.vocab_size``.
+
+    0 is padding and 1 an unknown move; from/to square pairs follow, then
+    under- and queen promotions by piece, direction and file.
+    """
+
+    PAD = 0
+    UNKNOWN = 1
+    PROMOTIONS = 2 + 64 * 64
+    vocab_size = PROMOTIONS + 4 * 2 * 8 * 8
+
+    def encode_move(self, uci: str) -> int:
+        try:
+            move = chess.Move.from_uci(uci)
+        except ValueError:
+            return self.UNKNOWN
+        if not move.promotion:
+            return 2 + move.from_square * 64 + move.to_square
+        white = chess.square_rank(move.to_square) == 7
+        return (
+            self.PROMOTIONS
+            + (move.promotion - chess.KNIGHT) * 128
+            + white * 64
+            + chess.square_file(move.from_square) * 8
+            + chess.square_file(move.to_square)
+        )
+
+    def encode(self, moves: List[str]) -> List[int]:
+        return [self.encode_move(move) for move in moves]
+
+
+# Pre-tokenized training data: one .npy per field, one fixed-length row per game
+SEQUENCE_FIELDS = {
+    "move_ids": np.int64,  # nn.Embedding wants long indices
+    "times": np.float32,
+    "evals": np.float32,
+    "attention_mask": np.int64,
+}
+GAME_FIELDS = {"white_elo": np.int64, "black_elo": np.int64}
+
+
+def pretokenize(
+    games: Sequence[GameData],
+    output_dir: str,
+    max_sequence_length: int = 128,
+    tokenizer=None,
+):
+    """Tokenize and pad ``games`` once into memory-mapped arrays.
+
+    The result is read by ``PretokenizedChessDataset``, which yields the same
+    items as ``ChessDataset`` without per-access tokenization.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = tokenizer or MoveTokenizer()
+    arrays = {
+        name: np.lib.format.open_memmap(
+            os.path.join(output_dir, f"{name}.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=(len(games), max_sequence_length),
+        )
+        for name, dtype in SEQUENCE_FIELDS.items()
+    }
+    arrays.update(
+        {
+            name: np.lib.format.open_memmap(
+                os.path.join(output_dir, f"{name}.npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=(len(games),),
+            )
+            for name, dtype in GAME_FIELDS.items()
+        }
+    )
+
+    for row, game in enumerate(games):
+        moves = game.moves[:max_sequence_length]
+        length = len(moves)
+        arrays["move_ids"][row, :length] = tokenizer.encode(moves)
+        times = game.times[:max_sequence_length]
+        arrays["times"][row, : len(times)] = times
+        evals = game.evals[:max_sequence_length]
+        arrays["evals"][row, : len(evals)] = evals
+        arrays["attention_mask"][row, :length] = 1
+        arrays["white_elo"][row] = game.white_elo
+        arrays["black_elo"][row] = game.black_elo
+
+    for array in arrays.values():
+        array.flush()
+    with open(os.path.join(output_dir, "meta.json"), "w") as handle:
+        json.dump(
+            {"games": len(games), "max_sequence_length": max_sequence_length}, handle
+        )
+
+
+class PretokenizedChessDataset(Dataset):
+    """Serves ``pretokenize`` output as zero-copy tensors over memory maps."""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        with open(os.path.join(data_dir, "meta.json")) as handle:
+            meta = json.load(handle)
+        self.length = meta["games"]
+        self.max_sequence_length = meta["max_sequence_length"]
+        # Opened on first access so DataLoader workers map the files themselves
+        # instead of receiving pickled copies
+        self.arrays: Optional[Dict[str, np.ndarray]] = None
+
+    def _open(self) -> Dict[str, np.ndarray]:
+        # Copy-on-write maps are writable views, which torch.from_numpy expects;
+        # nothing is copied unless a tensor is modified in place
+        return {
+            name: np.load(os.path.join(self.data_dir, f"{name}.npy"), mmap_mode="c")
+            for name in (*SEQUENCE_FIELDS, *GAME_FIELDS)
+        }
+
+    def __getstate__(self) -> Dict:
+        return {**self.__dict__, "arrays": None}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, idx: int) -> Dict[str, torch.Tensor]:
+        if self.arrays is None:
+            self.arrays = self._open()
+        return {
+            name: torch.from_numpy(array[idx, ...])
+            for name, array in self.arrays.items()
+        }
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Float
 from datetime import datetime
 
 Base = declarative_base()
@@ -12,6 +12,7 @@ class MoveAnalysis(Base):
     game_id = Column(String, index=True)
     move_number = Column(Integer)
     position_fen = Column(String)
+    position_key = Column(BigInteger, index=True)  # signed Zobrist key
     move_uci = Column(String)
     time_taken = Column(Float)
     complexity_score = Column(Float)
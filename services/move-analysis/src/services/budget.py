@@ -0,0 +1,38 @@
+from typing import Dict, List, Optional
+
+from .complexity import ComplexityAnalyzer
+
+
+class AnalysisBudgetPlanner:
+    """Builds adaptive engine-service requests with per-ply complexity hints.
+
+    The engine service stops quiet or forced plies early and extends plies
+    whose complexity is at or above its critical threshold.
+    """
+
+    def __init__(self, analyzer: Optional[ComplexityAnalyzer] = None):
+        self.analyzer = analyzer or ComplexityAnalyzer()
+
+    def complexity_hints(
+        self, moves: List[str], starting_fen: Optional[str] = None
+    ) -> List[float]:
+        """Complexity of every position in the game, including the final one."""
+        scores = self.analyzer.analyze_game(moves, starting_fen)
+        return scores["total_score"].tolist()
+
+    def batch_request(
+        self,
+        moves: List[str],
+        starting_fen: Optional[str] = None,
+        depth: int = 20,
+        tolerance: Optional[float] = None,
+    ) -> Dict:
+        """Body for ``/analyze_batch`` with adaptive budgeting enabled."""
+        return {
+            "fen": starting_fen,
+            "moves": moves,
+            "depth": depth,
+            "adaptive": True,
+            "complexity": self.complexity_hints(moves, starting_fen),
+            "tolerance": tolerance,
+        }
@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+import os
+import time
+import numpy as np
+import structlog
+
+from .complexity import COMPLEXITY_DTYPE, ComplexityAnalyzer
+
+logger = structlog.get_logger()
+
+# (uci moves, starting fen or None)
+Game = Tuple[List[str], Optional[str]]
+
+_analyzer: Optional[ComplexityAnalyzer] = None
+
+
+@dataclass
+class WorkerStats:
+    pid: int
+    chunks: int = 0
+    games: int = 0
+    plies: int = 0
+    seconds: float = 0.0
+
+    @property
+    def plies_per_second(self) -> float:
+        return self.plies / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class BulkScores:
+    scores: np.ndarray  # COMPLEXITY_DTYPE rows of every game, back to back
+    offsets: np.ndarray  # game i owns scores[offsets[i]:offsets[i + 1]]
+    workers: Dict[int, WorkerStats] = field(default_factory=dict)
+
+    def game(self, index: int) -> np.ndarray:
+        return self.scores[self.offsets[index] : self.offsets[index + 1]]
+
+
+def _init_worker():
+    global _analyzer
+    _analyzer = ComplexityAnalyzer()
+
+
+def _score_chunk(
+    shm_name: str, total_rows: int, games: Sequence[Game], offsets: Sequence[int]
+) -> Tuple[int, int, float]:
+    """Score a chunk of games straight into the shared result array."""
+    start = time.perf_counter()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        scores = np.ndarray(total_rows, dtype=COMPLEXITY_DTYPE, buffer=shm.buf)
+        plies = 0
+        for (moves, starting_fen), offset in zip(games, offsets):
+            scores[offset : offset + len(moves) + 1] = _analyzer.analyze_game(
+                moves, starting_fen
+            )
+            plies += len(moves) + 1
+        del scores
+    finally:
+        shm.close()
+    return os.getpid(), plies, time.perf_counter() - start
+
+
+class BulkComplexityScorer:
+    """Scores archived games across a process pool for historical re-analysis.
+
+    Games are sent in chunks; workers write rows into one shared-memory array
+    and only return their timings, so results are never pickled.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 64):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def score_games(self, games: Sequence[Game]) -> BulkScores:
+        offsets = np.zeros(len(games) + 1, dtype=np.int64)
+        np.cumsum([len(moves) + 1 for moves, _ in games], out=offsets[1:])
+        total_rows = int(offsets[-1])
+
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(total_rows * COMPLEXITY_DTYPE.itemsize, 1)
+        )
+        stats: Dict[int, WorkerStats] = {}
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        _score_chunk,
+                        shm.name,
+                        total_rows,
+                        games[i : i + self.chunk_size],
+                        offsets[i : i + self.chunk_size].tolist(),
+                    ): min(self.chunk_size, len(games) - i)
+                    for i in range(0, len(games), self.chunk_size)
+                }
+                for future in as_completed(futures):
+                    pid, plies, seconds = future.result()
+                    worker = stats.setdefault(pid, WorkerStats(pid))
+                    worker.chunks += 1
+                    worker.games += futures[future]
+                    worker.plies += plies
+                    worker.seconds += seconds
+
+            scores = np.ndarray(
+                total_rows, dtype=COMPLEXITY_DTYPE, buffer=shm.buf
+            ).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        for worker in stats.values():
+            logger.info(
+                "Complexity worker throughput",
+                pid=worker.pid,
+                chunks=worker.chunks,
+                games=worker.games,
+                plies=worker.plies,
+                plies_per_second=round(worker.plies_per_second, 1),
+            )
+        return BulkScores(scores=scores, offsets=offsets, workers=stats)
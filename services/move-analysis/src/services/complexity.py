@@ -1,6 +1,38 @@
 from dataclasses import dataclass
 import chess
-from typing import Dict, Set
+import numpy as np
+from typing import Dict, List, Optional, Set
+
+
+def _pawn_shield_masks(color: chess.Color) -> List[chess.Bitboard]:
+    """Squares directly in front of the king (same and adjacent files)."""
+    masks = []
+    for square in chess.SQUARES:
+        rank = chess.square_rank(square) + (1 if color else -1)
+        mask = chess.BB_EMPTY
+        if 0 <= rank <= 7:
+            for file in range(
+                chess.square_file(square) - 1, chess.square_file(square) + 2
+            ):
+                if 0 <= file <= 7:
+                    mask |= chess.BB_SQUARES[chess.square(file, rank)]
+        masks.append(mask)
+    return masks
+
+
+PAWN_SHIELDS = {color: _pawn_shield_masks(color) for color in chess.COLORS}
+
+# One row per ply, one column per ComplexityMetrics field
+COMPLEXITY_DTYPE = np.dtype(
+    [
+        ("mobility", np.float64),
+        ("piece_tension", np.float64),
+        ("king_safety", np.float64),
+        ("pawn_structure", np.float64),
+        ("material_imbalance", np.float64),
+        ("total_score", np.float64),
+    ]
+)
 
 
 @dataclass
@@ -30,12 +62,8 @@ class ComplexityAnalyzer:
         pawn_structure = self._calculate_pawn_structure(board)
         material_imbalance = self._calculate_material_imbalance(board)
 
-        total_score = (
-            mobility * 0.25
-            + piece_tension * 0.25
-            + king_safety * 0.2
-            + pawn_structure * 0.15
-            + material_imbalance * 0.15
+        total_score = self._total_score(
+            mobility, piece_tension, king_safety, pawn_structure, material_imbalance
         )
 
         return ComplexityMetrics(
@@ -47,19 +75,79 @@ class ComplexityAnalyzer:
             total_score=total_score,
         )
 
+    def analyze_game(
+        self, moves: List[str], starting_fen: Optional[str] = None
+    ) -> np.ndarray:
+        """Score every position of a game, including the final one.
+
+        Returns a ``COMPLEXITY_DTYPE`` array with ``len(moves) + 1`` rows.
+        Pawn structure is only rescored when a pawn moved or was captured, and
+        material only after captures and promotions.
+        """
+        board = chess.Board(starting_fen) if starting_fen else chess.Board()
+        scores = np.empty(len(moves) + 1, dtype=COMPLEXITY_DTYPE)
+
+        pawn_structure = self._calculate_pawn_structure(board)
+        material_imbalance = self._calculate_material_imbalance(board)
+        for ply in range(len(moves) + 1):
+            if ply:
+                move = board.parse_uci(moves[ply - 1])
+                changes_material = move.promotion or board.is_capture(move)
+                pawns = board.pawns
+                board.push(move)
+                if changes_material:
+                    material_imbalance = self._calculate_material_imbalance(board)
+                if board.pawns != pawns:
+                    pawn_structure = self._calculate_pawn_structure(board)
+
+            mobility = self._calculate_mobility(board)
+            piece_tension = self._calculate_piece_tension(board)
+            king_safety = self._calculate_king_safety(board)
+            scores[ply] = (
+                mobility,
+                piece_tension,
+                king_safety,
+                pawn_structure,
+                material_imbalance,
+                self._total_score(
+                    mobility,
+                    piece_tension,
+                    king_safety,
+                    pawn_structure,
+                    material_imbalance,
+                ),
+            )
+        return scores
+
+    @staticmethod
+    def _total_score(
+        mobility: float,
+        piece_tension: float,
+        king_safety: float,
+        pawn_structure: float,
+        material_imbalance: float,
+    ) -> float:
+        return (
+            mobility * 0.25
+            + piece_tension * 0.25
+            + king_safety * 0.2
+            + pawn_structure * 0.15
+            + material_imbalance * 0.15
+        )
+
     def _calculate_mobility(self, board: chess.Board) -> float:
         """Calculate piece mobility as a ratio of legal moves to maximum possible."""
-        return len(list(board.legal_moves)) / 218.0  # Normalized by max possible moves
+        return board.legal_moves.count() / 218.0  # Normalized by max possible moves
 
     def _calculate_piece_tension(self, board: chess.Board) -> float:
         """Calculate tension based on attacked and defending pieces."""
         tension = 0
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                attackers = board.attackers(not piece.color, square)
-                defenders = board.attackers(piece.color, square)
-                tension += len(attackers) * len(defenders)
+        for color in (chess.WHITE, chess.BLACK):
+            for square in chess.scan_forward(board.occupied_co[color]):
+                attackers = board.attackers_mask(not color, square)
+                if attackers:
+                    defenders = board.attackers_mask(color, square)
+                    tension += chess.popcount(attackers) * chess.popcount(defenders)
         return min(tension / 20.0, 1.0)  # Normalized with a cap
 
     def _calculate_king_safety(self, board: chess.Board) -> float:
@@ -67,10 +155,43 @@ class ComplexityAnalyzer:
         safety_score = 0
         for color in [chess.WHITE, chess.BLACK]:
             king_square = board.king(color)
-            if king_square:
+            if king_square is not None:
                 # Check pawn shield
                 pawn_shield = self._evaluate_pawn_shield(board, king_square, color)
                 # Check attacking pieces
-                attacking_pieces = len(board.attackers(not color, king_square))
+                attacking_pieces = chess.popcount(
+                    board.attackers_mask(not color, king_square)
+                )
                 safety_score += pawn_shield - (attacking_pieces * 0.2)
         return max(min(safety_score / 2.0, 1.0), 0.0)
+
+    def _evaluate_pawn_shield(
+        self, board: chess.Board, king_square: chess.Square, color: chess.Color
+    ) -> float:
+        """Fraction of the three squares in front of the king held by own pawns."""
+        pawns = board.pawns & board.occupied_co[color]
+        return chess.popcount(pawns & PAWN_SHIELDS[color][king_square]) / 3.0
+
+    def _calculate_pawn_structure(self, board: chess.Board) -> float:
+        """Score pawn structure weaknesses (doubled and isolated pawns)."""
+        weaknesses = 0
+        for color in [chess.WHITE, chess.BLACK]:
+            pawn_files = [
+                chess.square_file(sq) for sq in board.pieces(chess.PAWN, color)
+            ]
+            for file in set(pawn_files):
+                count = pawn_files.count(file)
+                weaknesses += count - 1  # doubled
+                if file - 1 not in pawn_files and file + 1 not in pawn_files:
+                    weaknesses += count  # isolated
+        return min(weaknesses / 8.0, 1.0)
+
+    def _calculate_material_imbalance(self, board: chess.Board) -> float:
+        """Material difference normalized by a full set of non-king material."""
+        balance = 0
+        for piece_type, value in self.piece_values.items():
+            balance += value * (
+                len(board.pieces(piece_type, chess.WHITE))
+                - len(board.pieces(piece_type, chess.BLACK))
+            )
+        return min(abs(balance) / 39.0, 1.0)
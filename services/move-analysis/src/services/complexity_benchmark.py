@@ -0,0 +1,101 @@
+"""Compare positions/second of the square-loop and bitboard complexity metrics.
+
+cd services/move-analysis && python -m src.services.complexity_benchmark
+"""
+
+from typing import Callable, List
+import argparse
+import random
+import time
+import chess
+
+from .complexity import ComplexityAnalyzer
+
+
+def legacy_piece_tension(board: chess.Board) -> float:
+    """Square-by-square implementation the bitboard version replaced."""
+    tension = 0
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece:
+            attackers = board.attackers(not piece.color, square)
+            defenders = board.attackers(piece.color, square)
+            tension += len(attackers) * len(defenders)
+    return min(tension / 20.0, 1.0)
+
+
+def legacy_king_safety(board: chess.Board) -> float:
+    safety_score = 0
+    for color in [chess.WHITE, chess.BLACK]:
+        king_square = board.king(color)
+        if king_square is not None:
+            shield_rank = chess.square_rank(king_square) + (1 if color else -1)
+            pawn_shield = 0.0
+            if 0 <= shield_rank <= 7:
+                king_file = chess.square_file(king_square)
+                pawns = board.pieces(chess.PAWN, color)
+                pawn_shield = (
+                    sum(
+                        1
+                        for f in (king_file - 1, king_file, king_file + 1)
+                        if 0 <= f <= 7 and chess.square(f, shield_rank) in pawns
+                    )
+                    / 3.0
+                )
+            attacking_pieces = len(board.attackers(not color, king_square))
+            safety_score += pawn_shield - (attacking_pieces * 0.2)
+    return max(min(safety_score / 2.0, 1.0), 0.0)
+
+
+def sample_positions(count: int, seed: int, max_ply: int = 80) -> List[chess.Board]:
+    """Positions from seeded random playouts, spread over all game phases."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(0, max_ply)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        boards.append(board)
+    return boards
+
+
+def rate(metric: Callable[[chess.Board], float], boards: List[chess.Board]):
+    start = time.perf_counter()
+    scores = [metric(board) for board in boards]
+    return scores, len(boards) / (time.perf_counter() - start)
+
+
+def benchmark(boards: List[chess.Board]):
+    analyzer = ComplexityAnalyzer()
+    cases = [
+        ("tension", legacy_piece_tension, analyzer._calculate_piece_tension),
+        ("king", legacy_king_safety, analyzer._calculate_king_safety),
+    ]
+    print(f"{'metric':<8} {'before pos/s':>13} {'after pos/s':>12} {'speedup':>8}")
+    for name, before, after in cases:
+        expected, before_rate = rate(before, boards)
+        actual, after_rate = rate(after, boards)
+        assert actual == expected, f"{name} diverged from the reference"
+        print(
+            f"{name:<8} {before_rate:>13.0f} {after_rate:>12.0f} "
+            f"{after_rate / before_rate:>7.1f}x"
+        )
+
+    _, total_rate = rate(analyzer.analyze_position, boards)
+    print(f"analyze_position: {total_rate:.0f} positions/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    benchmark(sample_positions(args.positions, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+from dataclasses import dataclass
+import time
+import numpy as np
+import structlog
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from services.common.zobrist import fen_key
+from ..models.analysis import MoveAnalysis
+
+logger = structlog.get_logger()
+
+COLORS = ("white", "black")
+
+# Structured per-ply result, in ply order
+CORRELATION_DTYPE = np.dtype(
+    [
+        ("has_candidates", np.bool_),  # the engine returned lines for the ply
+        ("top1", np.bool_),
+        ("top3", np.bool_),
+        ("centipawn_loss", np.float64),  # NaN if the played move can't be scored
+        ("engine_correlation", np.float64),
+    ]
+)
+
+INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+@dataclass
+class EngineCorrelationMetrics:
+    top1_match: float  # Share of moves equal to the engine's first choice
+    top3_match: float  # Share of moves among the engine's first three choices
+    average_centipawn_loss: float  # Per-ply loss capped at loss_cap
+    engine_correlation: float  # Mean per-ply correlation
+
+
+@dataclass
+class WriteStats:
+    rows: int
+    statements: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class EngineCorrelationScorer:
+    """Compares played moves with the engine's multipv lines for a whole game.
+
+    Consumes the ``/analyze_batch`` lines of the engine service. A move found
+    in the multipv list is scored from its own line; otherwise its value is
+    taken from the next ply's evaluation, negated for the side to move.
+    """
+
+    def __init__(self, loss_cap: float = 300.0, chunk_size: int = 1000):
+        self.loss_cap = loss_cap  # centipawn loss at which correlation reaches 0
+        self.chunk_size = chunk_size
+
+    def score_game(self, lines: Iterable[Dict]) -> np.ndarray:
+        """``CORRELATION_DTYPE`` row per ply with a played move."""
+        by_ply = {line["ply"]: line for line in lines}
+        plies = sorted(ply for ply, line in by_ply.items() if line.get("played"))
+        scores = np.zeros(len(plies), dtype=CORRELATION_DTYPE)
+
+        for row, ply in enumerate(plies):
+            line = by_ply[ply]
+            candidates = line.get("moves") or []
+            if not candidates:
+                scores[row]["centipawn_loss"] = np.nan
+                continue
+            ranked = [candidate["move"] for candidate in candidates]
+            played = line["played"]
+            scores[row]["has_candidates"] = True
+            scores[row]["top1"] = ranked[0] == played
+            scores[row]["top3"] = played in ranked[:3]
+
+            if played in ranked:
+                played_score = candidates[ranked.index(played)]["score"]
+            elif by_ply.get(ply + 1, {}).get("moves"):
+                played_score = -by_ply[ply + 1]["score"]
+            else:
+                scores[row]["centipawn_loss"] = np.nan
+                continue
+            scores[row]["centipawn_loss"] = max(
+                candidates[0]["score"] - played_score, 0
+            )
+
+        loss = np.minimum(scores["centipawn_loss"], self.loss_cap)
+        scores["engine_correlation"] = 1 - loss / self.loss_cap
+        return scores
+
+    def summarize(self, scores: np.ndarray, first_ply: int = 0) -> Dict:
+        """``EngineCorrelationMetrics`` per color.
+
+        Match rates only count plies the engine returned lines for, and each
+        ply's loss is capped at ``loss_cap`` so a missed mate can't dominate
+        the average.
+        """
+        summary = {}
+        for side, color in enumerate(COLORS):
+            own = scores[(first_ply + side) % 2 :: 2]
+            ranked = own[own["has_candidates"]]
+            scored = own[~np.isnan(own["centipawn_loss"])]
+            loss = np.minimum(scored["centipawn_loss"], self.loss_cap)
+            summary[color] = EngineCorrelationMetrics(
+                top1_match=float(ranked["top1"].mean()) if len(ranked) else 0.0,
+                top3_match=float(ranked["top3"].mean()) if len(ranked) else 0.0,
+                average_centipawn_loss=float(loss.mean()) if len(loss) else 0.0,
+                engine_correlation=(
+                    float(scored["engine_correlation"].mean()) if len(scored) else 0.0
+                ),
+            )
+        return summary
+
+    def rows(
+        self,
+        game_id: str,
+        lines: Sequence[Dict],
+        scores: np.ndarray,
+        complexity: Optional[Sequence[float]] = None,
+    ) -> List[Dict]:
+        """``MoveAnalysis`` rows keyed like ``GameAnalysisStage.rows``."""
+        played = sorted(
+            (line for line in lines if line.get("played")), key=lambda line: line["ply"]
+        )
+        rows = []
+        for line, score in zip(played, scores):
+            correlation = score["engine_correlation"]
+            rows.append(
+                {
+                    "id": f"{game_id}:{line['ply'] + 1}",
+                    "game_id": game_id,
+                    "move_number": line["ply"] + 1,  # 1-based ply
+                    "position_fen": line["fen"],
+                    "position_key": (
+                        line["key"] if "key" in line else fen_key(line["fen"])
+                    ),
+                    "move_uci": line["played"],
+                    "complexity_score": (
+                        complexity[line["ply"]]
+                        if complexity is not None and line["ply"] < len(complexity)
+                        else None
+                    ),
+                    "engine_correlation": (
+                        None if np.isnan(correlation) else float(correlation)
+                    ),
+                }
+            )
+        return rows
+
+    def write(self, session: Session, rows: List[Dict]) -> WriteStats:
+        """Upsert rows with one multi-row INSERT per chunk.
+
+        Plies already stored by the pipeline stage only get their engine
+        correlation (and complexity, when given) filled in.
+        """
+        insert = INSERTS[session.get_bind().dialect.name]
+        start = time.perf_counter()
+        statements = 0
+        for offset in range(0, len(rows), self.chunk_size):
+            stmt = insert(MoveAnalysis).values(rows[offset : offset + self.chunk_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MoveAnalysis.id],
+                set_={
+                    "engine_correlation": stmt.excluded.engine_correlation,
+                    "complexity_score": func.coalesce(
+                        stmt.excluded.complexity_score, MoveAnalysis.complexity_score
+                    ),
+                },
+            )
+            session.execute(stmt)
+            statements += 1
+
+        stats = WriteStats(
+            rows=len(rows), statements=statements, seconds=time.perf_counter() - start
+        )
+        logger.info(
+            "Engine correlation rows written",
+            rows=stats.rows,
+            statements=stats.statements,
+            rows_per_second=round(stats.rows_per_second, 1),
+        )
+        return stats
@@ -0,0 +1,174 @@
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..models.analysis import MoveAnalysis
+from .complexity import ComplexityAnalyzer
+from .engine_correlation import INSERTS
+from .time_bank import TIME_BANK_DTYPE, TimeBankAnalyzer, TimeBankMetrics
+from .timing import TIMING_DTYPE, TimingAnalyzer, TimingMetrics, pad_batch
+
+COLORS = ("white", "black")
+
+
+@dataclass
+class GameAnalysis:
+    game_id: str
+    moves: List[str]
+    fens: List[str]  # position before each move
+    keys: List[int]  # Zobrist key of the position before each move
+    complexity: np.ndarray  # COMPLEXITY_DTYPE row for the position before each move
+    move_times: np.ndarray  # seconds per ply, NaN without clock data
+    remaining_time: np.ndarray  # clock after each ply, NaN without clock data
+    timing: Dict[str, TimingMetrics]
+    time_bank: Dict[str, TimeBankMetrics]
+
+
+def parse_time_control(time_control: str) -> Tuple[Optional[float], float]:
+    """Base time and increment in seconds from a PGN ``TimeControl`` tag."""
+    try:
+        base, _, increment = time_control.partition("+")
+        return float(base), float(increment or 0)
+    except ValueError:
+        return None, 0.0
+
+
+def move_times_from_clocks(
+    clocks: List[Optional[float]], time_control: str
+) -> np.ndarray:
+    """Seconds spent on each ply from the remaining-clock annotations."""
+    base, increment = parse_time_control(time_control)
+    remaining = np.array([np.nan if c is None else c for c in clocks], dtype=float)
+    previous = np.full(len(remaining), np.nan)
+    previous[:2] = np.nan if base is None else base
+    previous[2:] = remaining[:-2]
+    # Each side's first move starts from the base time; no increment yet
+    increments = np.full(len(remaining), increment)
+    increments[:2] = 0.0
+    return np.maximum(previous + increments - remaining, 0.0)
+
+
+class GameAnalysisStage:
+    """Complexity, timing and time-bank analysis of a game in one pass.
+
+    Takes a game as produced by ``PGNHandler.process_pgn_file``, replays it
+    once for complexity and feeds the same per-ply arrays to the batched
+    timing and time-bank analyzers, one row per player.
+    """
+
+    def __init__(
+        self,
+        complexity_analyzer: Optional[ComplexityAnalyzer] = None,
+        timing_analyzer: Optional[TimingAnalyzer] = None,
+        time_bank_analyzer: Optional[TimeBankAnalyzer] = None,
+    ):
+        self.complexity_analyzer = complexity_analyzer or ComplexityAnalyzer()
+        self.timing_analyzer = timing_analyzer or TimingAnalyzer()
+        self.time_bank_analyzer = time_bank_analyzer or TimeBankAnalyzer()
+
+    def analyze(self, game_id: str, game: Dict) -> GameAnalysis:
+        plies = game["moves"]
+        moves = [ply["move"] for ply in plies]
+        fens = [ply["fen"] for ply in plies]
+        keys = [ply["key"] for ply in plies]
+        starting_fen = fens[0] if fens else None
+
+        complexity = self.complexity_analyzer.analyze_game(moves, starting_fen)[:-1]
+        remaining = np.array(
+            [np.nan if ply["clock"] is None else ply["clock"] for ply in plies],
+            dtype=float,
+        )
+        move_times = move_times_from_clocks(
+            [ply["clock"] for ply in plies], game.get("time_control", "")
+        )
+
+        # One row per player, white first, restricted to plies with clock data;
+        # games set up with black to move start with a black ply
+        first_ply = 1 if starting_fen and starting_fen.split()[1] == "b" else 0
+        per_player = []
+        for side in range(len(COLORS)):
+            start = (first_ply + side) % 2
+            own = np.flatnonzero(~np.isnan(move_times[start::2])) * 2 + start
+            per_player.append(own)
+        times, lengths = pad_batch([move_times[index] for index in per_player])
+        clocks, _ = pad_batch([remaining[index] for index in per_player])
+        scores, _ = pad_batch(
+            [complexity["total_score"][index] for index in per_player]
+        )
+        timing = self.timing_analyzer.analyze_batch(times, scores, lengths)
+        time_bank = self.time_bank_analyzer.analyze_batch(
+            times, clocks, scores, lengths
+        )
+
+        return GameAnalysis(
+            game_id=game_id,
+            moves=moves,
+            fens=fens,
+            keys=keys,
+            complexity=complexity,
+            move_times=move_times,
+            remaining_time=remaining,
+            timing={
+                color: TimingMetrics(
+                    **{name: float(timing[side][name]) for name in TIMING_DTYPE.names}
+                )
+                for side, color in enumerate(COLORS)
+            },
+            time_bank={
+                color: TimeBankMetrics(
+                    **{
+                        name: float(time_bank[side][name])
+                        for name in TIME_BANK_DTYPE.names
+                    }
+                )
+                for side, color in enumerate(COLORS)
+            },
+        )
+
+    def rows(self, analysis: GameAnalysis) -> List[Dict]:
+        """``MoveAnalysis`` rows, one per ply."""
+        return [
+            {
+                "id": f"{analysis.game_id}:{ply + 1}",
+                "game_id": analysis.game_id,
+                "move_number": ply + 1,  # 1-based ply
+                "position_fen": fen,
+                "position_key": key,
+                "move_uci": move,
+                "time_taken": None if np.isnan(taken) else float(taken),
+                "complexity_score": float(score),
+                "engine_correlation": None,
+            }
+            for ply, (fen, key, move, taken, score) in enumerate(
+                zip(
+                    analysis.fens,
+                    analysis.keys,
+                    analysis.moves,
+                    analysis.move_times,
+                    analysis.complexity["total_score"],
+                )
+            )
+        ]
+
+    def process(self, session: Session, game_id: str, game: Dict) -> GameAnalysis:
+        """Analyze a game and upsert its plies with a single bulk statement.
+
+        Reprocessing a game replaces its plies; an engine correlation already
+        written by ``EngineCorrelationScorer`` is kept.
+        """
+        analysis = self.analyze(game_id, game)
+        rows = self.rows(analysis)
+        if rows:
+            insert = INSERTS[session.get_bind().dialect.name]
+            stmt = insert(MoveAnalysis).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MoveAnalysis.id],
+                set_={
+                    name: stmt.excluded[name]
+                    for name in rows[0]
+                    if name not in ("id", "engine_correlation")
+                },
+            )
+            session.execute(stmt)
+        return analysis
@@ -1,7 +1,16 @@
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Optional
 import numpy as np
 
+# One row per game, one column per TimeBankMetrics field
+TIME_BANK_DTYPE = np.dtype(
+    [
+        ("usage_pattern", np.float64),
+        ("critical_decisions", np.float64),
+        ("time_pressure_handling", np.float64),
+    ]
+)
+
 
 @dataclass
 class TimeBankMetrics:
@@ -30,6 +39,39 @@ class TimeBankAnalyzer:
             ),
         )
 
+    def analyze_batch(
+        self,
+        move_times: np.ndarray,
+        remaining_time: np.ndarray,
+        position_complexity: np.ndarray,
+        lengths: np.ndarray,
+    ) -> np.ndarray:
+        """Vectorized ``analyze_time_management`` over many games at once.
+
+        Inputs are padded ``(games, max_len)`` arrays (see ``timing.pad_batch``)
+        whose first ``lengths[i]`` entries are valid. Returns one
+        ``TIME_BANK_DTYPE`` row per game.
+        """
+        times = np.asarray(move_times, dtype=np.float64)
+        remaining = np.asarray(remaining_time, dtype=np.float64)
+        complexity = np.asarray(position_complexity, dtype=np.float64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        mask = np.arange(times.shape[1]) < lengths[:, None]
+        result = np.empty(len(lengths), dtype=TIME_BANK_DTYPE)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(remaining > 0, times / remaining, 1.0)
+            usage = 1 - np.minimum(_masked_std(rates, mask), 1.0)
+            result["usage_pattern"] = np.where(lengths < 2, 1.0, usage)
+
+            threshold = _masked_mean(complexity, mask) + _masked_std(complexity, mask)
+            critical = mask & (complexity > threshold[:, None])
+            result["critical_decisions"] = _critical_ratio(times, critical, mask)
+
+            pressure = mask & (remaining < self.pressure_threshold)
+            result["time_pressure_handling"] = _pressure_ratio(times, pressure, mask)
+        return result
+
     def _analyze_usage_pattern(
         self, move_times: List[float], remaining_time: List[float]
     ) -> float:
@@ -38,9 +80,11 @@ class TimeBankAnalyzer:
             return 1.0
 
         # Calculate time usage rate
-        usage_rates = [
-            t / r if r > 0 else 1.0 for t, r in zip(move_times, remaining_time)
-        ]
+        n = min(len(move_times), len(remaining_time))
+        times = np.asarray(move_times[:n], dtype=np.float64)
+        remaining = np.asarray(remaining_time[:n], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            usage_rates = np.where(remaining > 0, times / remaining, 1.0)
 
         # Look for consistency in usage rate
         std_dev = np.std(usage_rates)
@@ -57,30 +101,13 @@ class TimeBankAnalyzer:
             return 1.0
 
         # Identify critical positions (high complexity)
-        mean_complexity = np.mean(complexity)
-        critical_positions = [
-            i
-            for i, c in enumerate(complexity)
-            if c > mean_complexity + np.std(complexity)
-        ]
-
-        if not critical_positions:
+        scores = np.asarray(complexity, dtype=np.float64)
+        if not scores.size:
             return 1.0
-
-        # Calculate average time usage in critical positions
-        critical_times = [move_times[i] for i in critical_positions]
-        normal_times = [
-            t for i, t in enumerate(move_times) if i not in critical_positions
-        ]
-
-        if not normal_times:
-            return 1.0
-
-        # Compare time usage
-        avg_critical = np.mean(critical_times)
-        avg_normal = np.mean(normal_times)
-
-        return min(avg_critical / avg_normal if avg_normal > 0 else 1.0, 1.0)
+        critical = _row_mask(scores > scores.mean() + scores.std(), len(move_times))
+        times = np.asarray(move_times, dtype=np.float64)[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(_critical_ratio(times, critical)[0])
 
     def _analyze_time_pressure(
         self, move_times: List[float], remaining_time: List[float]
@@ -89,27 +116,48 @@ class TimeBankAnalyzer:
         if not move_times or not remaining_time:
             return 1.0  # Default score if there's no data.
 
-        # Identify indices of moves under time pressure
-        pressure_indices = [
-            i for i, r in enumerate(remaining_time) if r < self.pressure_threshold
-        ]
+        # Identify moves under time pressure
+        remaining = np.asarray(remaining_time, dtype=np.float64)
+        pressure = _row_mask(remaining < self.pressure_threshold, len(move_times))
+        times = np.asarray(move_times, dtype=np.float64)[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(_pressure_ratio(times, pressure)[0])
 
-        if not pressure_indices:
-            return 1.0  # Perfect handling if no time pressure occurred.
 
-        # Calculate average move time under and not under time pressure
-        pressure_move_times = [move_times[i] for i in pressure_indices]
-        normal_move_times = [
-            t for i, t in enumerate(move_times) if i not in pressure_indices
-        ]
+def _row_mask(flags: np.ndarray, length: int) -> np.ndarray:
+    """Per-move flags as a one-row mask, padded or cut to ``length`` moves."""
+    mask = np.zeros((1, length), dtype=bool)
+    mask[0, : min(length, len(flags))] = flags[:length]
+    return mask
 
-        avg_pressure_time = np.mean(pressure_move_times) if pressure_move_times else 0.0
-        avg_normal_time = np.mean(normal_move_times) if normal_move_times else 0.0
 
-        # Normalize the ratio: players who maintain similar move times under pressure score higher
-        pressure_handling_ratio = (
-            avg_normal_time / avg_pressure_time if avg_pressure_time > 0 else 1.0
-        )
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    return np.where(mask, values, 0).sum(axis=1) / mask.sum(axis=1)
+
+
+def _masked_std(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    centered = np.where(mask, values - _masked_mean(values, mask)[:, None], 0)
+    return np.sqrt((centered**2).sum(axis=1) / mask.sum(axis=1))
+
+
+def _critical_ratio(
+    times: np.ndarray, critical: np.ndarray, mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Average time in critical positions relative to the rest, capped at 1."""
+    normal = ~critical if mask is None else mask & ~critical
+    avg_critical = _masked_mean(times, critical)
+    avg_normal = _masked_mean(times, normal)
+    ratio = np.minimum(np.where(avg_normal > 0, avg_critical / avg_normal, 1.0), 1.0)
+    return np.where(critical.any(axis=1) & normal.any(axis=1), ratio, 1.0)
+
 
-        # Return a score where 1.0 means great handling (consistent move times) and lower is worse
-        return min(pressure_handling_ratio, 1.0)
+def _pressure_ratio(
+    times: np.ndarray, pressure: np.ndarray, mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Average normal move time relative to moves under pressure, capped at 1."""
+    normal = ~pressure if mask is None else mask & ~pressure
+    avg_pressure = np.nan_to_num(_masked_mean(times, pressure))
+    avg_normal = np.nan_to_num(_masked_mean(times, normal))
+    # Players who maintain similar move times under pressure score higher
+    ratio = np.where(avg_pressure > 0, avg_normal / avg_pressure, 1.0)
+    return np.where(pressure.any(axis=1), np.minimum(ratio, 1.0), 1.0)
@@ -0,0 +1,112 @@
+"""Compare list-based, mask-based and batched TimeBankAnalyzer across game lengths.
+
+cd services/move-analysis && python -m src.services.time_bank_benchmark
+"""
+
+from typing import List, Tuple
+import argparse
+import time
+import numpy as np
+
+from .time_bank import TimeBankAnalyzer
+from .timing import pad_batch
+
+Game = Tuple[List[float], List[float], List[float]]
+
+
+def legacy_critical_decisions(move_times, complexity) -> float:
+    """List-based implementation the mask version replaced."""
+    if not move_times:
+        return 1.0
+    mean_complexity = np.mean(complexity)
+    critical_positions = [
+        i for i, c in enumerate(complexity) if c > mean_complexity + np.std(complexity)
+    ]
+    if not critical_positions:
+        return 1.0
+    critical_times = [move_times[i] for i in critical_positions]
+    normal_times = [t for i, t in enumerate(move_times) if i not in critical_positions]
+    if not normal_times:
+        return 1.0
+    avg_critical = np.mean(critical_times)
+    avg_normal = np.mean(normal_times)
+    return min(avg_critical / avg_normal if avg_normal > 0 else 1.0, 1.0)
+
+
+def legacy_time_pressure(move_times, remaining_time, threshold: float) -> float:
+    if not move_times or not remaining_time:
+        return 1.0
+    pressure_indices = [i for i, r in enumerate(remaining_time) if r < threshold]
+    if not pressure_indices:
+        return 1.0
+    pressure_move_times = [move_times[i] for i in pressure_indices]
+    normal_move_times = [
+        t for i, t in enumerate(move_times) if i not in pressure_indices
+    ]
+    avg_pressure_time = np.mean(pressure_move_times) if pressure_move_times else 0.0
+    avg_normal_time = np.mean(normal_move_times) if normal_move_times else 0.0
+    ratio = avg_normal_time / avg_pressure_time if avg_pressure_time > 0 else 1.0
+    return min(ratio, 1.0)
+
+
+def sample_game(rng: np.random.Generator, moves: int, base: float = 180.0) -> Game:
+    """A blitz-like clock trace: exponential think times against a running clock."""
+    times = rng.exponential(base / moves * 1.5, moves)
+    remaining = np.maximum(base - np.cumsum(times), 0.1)
+    return times.tolist(), remaining.tolist(), rng.random(moves).tolist()
+
+
+def benchmark(lengths: List[int], games: int, seed: int):
+    rng = np.random.default_rng(seed)
+    analyzer = TimeBankAnalyzer()
+    print(
+        f"{'moves':>6} {'legacy games/s':>15} "
+        f"{'mask games/s':>13} {'batch games/s':>14}"
+    )
+    for length in lengths:
+        sample = [sample_game(rng, length) for _ in range(games)]
+
+        start = time.perf_counter()
+        expected = [
+            (
+                legacy_critical_decisions(times, complexity),
+                legacy_time_pressure(times, remaining, analyzer.pressure_threshold),
+            )
+            for times, remaining, complexity in sample
+        ]
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        metrics = [analyzer.analyze_time_management(*game) for game in sample]
+        mask_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        times, game_lengths = pad_batch([game[0] for game in sample])
+        remaining, _ = pad_batch([game[1] for game in sample])
+        complexity, _ = pad_batch([game[2] for game in sample])
+        batch = analyzer.analyze_batch(times, remaining, complexity, game_lengths)
+        batch_time = time.perf_counter() - start
+
+        actual = [(m.critical_decisions, m.time_pressure_handling) for m in metrics]
+        assert np.allclose(actual, expected), "mask path diverged from the reference"
+        assert np.allclose(
+            batch[["critical_decisions", "time_pressure_handling"]].tolist(), expected
+        ), "batch path diverged from the reference"
+        print(
+            f"{length:>6} {games / legacy_time:>15.0f} {games / mask_time:>13.0f} "
+            f"{games / batch_time:>14.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[40, 80, 150, 300])
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    benchmark(args.lengths, args.games, args.seed)
+
+
+if __name__ == "__main__":
+    main()
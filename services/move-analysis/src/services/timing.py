@@ -1,8 +1,44 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence, Tuple
+from collections import deque
 from dataclasses import dataclass
 from scipy import stats
 
+# One row per game, one column per TimingMetrics field
+TIMING_DTYPE = np.dtype(
+    [
+        ("consistency", np.float64),
+        ("correlation_with_complexity", np.float64),
+        ("outlier_score", np.float64),
+        ("average_time", np.float64),
+        ("deviation_pattern", np.float64),
+    ]
+)
+
+
+def pad_batch(sequences: Sequence[Sequence[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack ragged per-game sequences into a zero-padded 2-D array plus lengths."""
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    padded = np.zeros((len(sequences), int(lengths.max(initial=0))))
+    for row, sequence in enumerate(sequences):
+        padded[row, : lengths[row]] = sequence
+    return padded, lengths
+
+
+def _masked_pearson(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Row-wise Pearson correlation over the masked-in columns; NaN if constant."""
+    count = mask.sum(axis=1)
+    x_dev = np.where(
+        mask, x - (x * mask).sum(axis=1, keepdims=True) / count[:, None], 0
+    )
+    y_dev = np.where(
+        mask, y - (y * mask).sum(axis=1, keepdims=True) / count[:, None], 0
+    )
+    r = (x_dev * y_dev).sum(axis=1) / np.sqrt(
+        (x_dev**2).sum(axis=1) * (y_dev**2).sum(axis=1)
+    )
+    return np.clip(r, -1.0, 1.0)
+
 
 @dataclass
 class TimingMetrics:
@@ -47,6 +83,80 @@ class TimingAnalyzer:
             deviation_pattern=deviation,
         )
 
+    def analyze_batch(
+        self,
+        move_times: np.ndarray,
+        complexity_scores: np.ndarray,
+        lengths: np.ndarray,
+    ) -> np.ndarray:
+        """Vectorized ``analyze_move_timing`` over many games at once.
+
+        ``move_times`` and ``complexity_scores`` are padded ``(games, max_len)``
+        arrays (see ``pad_batch``) whose first ``lengths[i]`` entries are valid.
+        Returns a ``TIMING_DTYPE`` row per game matching the scalar path up to
+        floating-point rounding.
+        """
+        times = np.asarray(move_times, dtype=np.float64)
+        complexity = np.asarray(complexity_scores, dtype=np.float64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if not times.shape[1]:
+            # Every game is empty; keep one padding column for the window gather
+            times = complexity = np.zeros((len(lengths), 1))
+        columns = np.arange(times.shape[1])
+        mask = columns < lengths[:, None]
+        n = np.maximum(lengths, 1)
+        result = np.zeros(len(lengths), dtype=TIMING_DTYPE)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(mask, times, 0).sum(axis=1) / n
+            centered = np.where(mask, times - mean[:, None], 0)
+            std = np.sqrt((centered**2).sum(axis=1) / n)
+
+            # Consistency: 1 - coefficient of variation
+            consistency = np.where(mean > 0, 1 - np.minimum(std / mean, 1), 1.0)
+
+            # Outliers: share of moves more than two standard deviations out
+            outliers = (np.abs(centered / std[:, None]) > 2) & mask
+            outlier_score = outliers.sum(axis=1) / n
+
+            # Correlation over the last window_size moves of each game
+            window = np.minimum(lengths, self.window_size)
+            offsets = np.arange(self.window_size)
+            index = np.clip(
+                (lengths - window)[:, None] + offsets, 0, max(times.shape[1] - 1, 0)
+            )
+            in_window = offsets < window[:, None]
+            correlation = (
+                _masked_pearson(
+                    np.take_along_axis(times, index, axis=1),
+                    np.take_along_axis(complexity, index, axis=1),
+                    in_window,
+                )
+                + 1
+            ) / 2
+
+            # Deviation pattern: lag-1 correlation of deviations from a 3-move mean
+            rolling_mean = (times[:, :-2] + times[:, 1:-1] + times[:, 2:]) / 3
+            deviations = times[:, 2:] - rolling_mean
+            lagged = columns[: max(times.shape[1] - 3, 0)] < (lengths - 3)[:, None]
+            deviation = np.abs(
+                np.nan_to_num(
+                    _masked_pearson(deviations[:, :-1], deviations[:, 1:], lagged)
+                )
+            )
+
+        short = lengths < self.min_moves_for_analysis
+        result["consistency"] = np.where(short, 1.0, consistency)
+        result["correlation_with_complexity"] = np.where(short, 1.0, correlation)
+        result["outlier_score"] = np.where(short, 0.0, outlier_score)
+        result["average_time"] = np.where(lengths > 0, mean, 0.0)
+        result["deviation_pattern"] = np.where(
+            lengths < max(self.window_size, self.min_moves_for_analysis),
+            0.0,
+            deviation,
+        )
+        return result
+
     def _calculate_consistency(self, move_times: List[float]) -> float:
         """Calculate how consistent the move times are."""
         if len(move_times) < 2:
@@ -95,3 +205,137 @@ class TimingAnalyzer:
         # Look for patterns in deviations
         deviation_pattern = np.corrcoef(deviations[:-1], deviations[1:])[0, 1]
         return abs(deviation_pattern if not np.isnan(deviation_pattern) else 0.0)
+
+
+class StreamingTimingAnalyzer:
+    """Constant-time-per-move ``TimingAnalyzer`` for live games.
+
+    Keeps Welford moments of the move times, ring buffers for the correlation
+    window and the 3-move rolling mean, and running co-moments of consecutive
+    rolling-mean deviations for the lag-1 autocorrelation. Unlike the batch
+    path, a move counts as an outlier if it was more than two standard
+    deviations out when it was played, since rescoring the whole history
+    would be O(n).
+    """
+
+    def __init__(self, window_size: int = 5, min_moves_for_analysis: int = 3):
+        self.window_size = window_size
+        self.min_moves_for_analysis = min_moves_for_analysis
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.outliers = 0
+        self.recent_times: deque = deque(maxlen=window_size)
+        self.recent_complexity: deque = deque(maxlen=window_size)
+        self.last_deviation: Optional[float] = None
+        # Bivariate moments of (deviation[i], deviation[i + 1]) pairs
+        self.pairs = 0
+        self.pair_mean = [0.0, 0.0]
+        self.pair_m2 = [0.0, 0.0]
+        self.pair_cov = 0.0
+
+    def update(self, move_time: float, complexity: float) -> TimingMetrics:
+        """Add one move and return the metrics over the game so far."""
+        if self.count >= 2:
+            std = np.sqrt(self.m2 / self.count)
+            if std > 0 and abs(move_time - self.mean) / std > 2:
+                self.outliers += 1
+
+        self.count += 1
+        delta = move_time - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (move_time - self.mean)
+
+        self.recent_times.append(move_time)
+        self.recent_complexity.append(complexity)
+        if self.count >= 3:
+            last_three = list(self.recent_times)[-3:]
+            self._add_deviation(move_time - sum(last_three) / 3)
+
+        return self.metrics()
+
+    def metrics(self) -> TimingMetrics:
+        if self.count < self.min_moves_for_analysis:
+            return TimingMetrics(
+                consistency=1.0,
+                correlation_with_complexity=1.0,
+                outlier_score=0.0,
+                average_time=self.mean,
+                deviation_pattern=0.0,
+            )
+
+        std = np.sqrt(self.m2 / self.count)
+        consistency = 1 - min(std / self.mean, 1) if self.mean > 0 else 1.0
+
+        deviation = 0.0
+        if self.count >= self.window_size and self.pairs >= 2:
+            denominator = np.sqrt(self.pair_m2[0] * self.pair_m2[1])
+            if denominator > 0:
+                deviation = abs(self.pair_cov / denominator)
+
+        return TimingMetrics(
+            consistency=float(consistency),
+            correlation_with_complexity=self._window_correlation(),
+            outlier_score=self.outliers / self.count,
+            average_time=self.mean,
+            deviation_pattern=float(deviation),
+        )
+
+    def _add_deviation(self, deviation: float):
+        previous, self.last_deviation = self.last_deviation, deviation
+        if previous is None:
+            return
+        self.pairs += 1
+        dx = previous - self.pair_mean[0]
+        self.pair_mean[0] += dx / self.pairs
+        dy = deviation - self.pair_mean[1]
+        self.pair_mean[1] += dy / self.pairs
+        self.pair_m2[0] += dx * (previous - self.pair_mean[0])
+        self.pair_m2[1] += dy * (deviation - self.pair_mean[1])
+        self.pair_cov += dx * (deviation - self.pair_mean[1])
+
+    def _window_correlation(self) -> float:
+        times, complexity = self.recent_times, self.recent_complexity
+        time_mean = sum(times) / len(times)
+        complexity_mean = sum(complexity) / len(complexity)
+        covariance = time_var = complexity_var = 0.0
+        for t, c in zip(times, complexity):
+            covariance += (t - time_mean) * (c - complexity_mean)
+            time_var += (t - time_mean) ** 2
+            complexity_var += (c - complexity_mean) ** 2
+        denominator = np.sqrt(time_var * complexity_var)
+        if denominator == 0:
+            return float("nan")  # pearsonr is undefined for constant input
+        correlation = max(min(covariance / denominator, 1.0), -1.0)
+        return (correlation + 1) / 2
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable state, e.g. to persist across a pod restart."""
+        return {
+            "window_size": self.window_size,
+            "min_moves_for_analysis": self.min_moves_for_analysis,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "outliers": self.outliers,
+            "recent_times": list(self.recent_times),
+            "recent_complexity": list(self.recent_complexity),
+            "last_deviation": self.last_deviation,
+            "pairs": self.pairs,
+            "pair_mean": list(self.pair_mean),
+            "pair_m2": list(self.pair_m2),
+            "pair_cov": self.pair_cov,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "StreamingTimingAnalyzer":
+        analyzer = cls(state["window_size"], state["min_moves_for_analysis"])
+        for name in ("count", "mean", "m2", "outliers", "last_deviation"):
+            setattr(analyzer, name, state[name])
+        analyzer.recent_times.extend(state["recent_times"])
+        analyzer.recent_complexity.extend(state["recent_complexity"])
+        analyzer.pairs = state["pairs"]
+        analyzer.pair_mean = list(state["pair_mean"])
+        analyzer.pair_m2 = list(state["pair_m2"])
+        analyzer.pair_cov = state["pair_cov"]
+        return analyzer
@@ -0,0 +1,16 @@
+# tests/conftest.py
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Shared code is imported as ``services.common``; each service imports its own
+# modules from its ``src`` package
+for path in (
+    ROOT,
+    os.path.join(ROOT, "services", "engine-service"),
+    os.path.join(ROOT, "services", "move-analysis"),
+    os.path.join(ROOT, "services", "ml-service"),
+):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,60 @@
+# tests/unit/conftest.py
+from typing import Callable, List
+import os
+import random
+import stat
+import sys
+import chess
+import pytest
+
+FAKE_UCI = os.path.join(os.path.dirname(__file__), "fake_uci.py")
+
+
+@pytest.fixture
+def fake_engine(tmp_path):
+    """Path of a fake UCI engine answering ``isready`` after ``delay`` seconds."""
+
+    def make(delay: float = 0.0) -> str:
+        path = tmp_path / f"fake_uci_{delay}"
+        path.write_text(
+            "#!/bin/sh\n"
+            f"FAKE_UCI_READY_DELAY={delay} exec {sys.executable} {FAKE_UCI}\n"
+        )
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        return str(path)
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def random_games() -> List[List[str]]:
+    """Reproducible random games in UCI, long enough to castle and promote."""
+    rng = random.Random(1)
+    games = []
+    for _ in range(24):
+        board = chess.Board()
+        plies = rng.randint(1, 240)
+        while len(board.move_stack) < plies and not board.is_game_over():
+            moves = list(board.legal_moves)
+            # Prefer captures and promotions so games reach varied material
+            forcing = [
+                move for move in moves if move.promotion or board.is_capture(move)
+            ]
+            board.push(rng.choice(forcing if forcing and rng.random() < 0.5 else moves))
+        games.append([move.uci() for move in board.move_stack])
+    return games
+
+
+@pytest.fixture(scope="session")
+def pgn_games() -> Callable[[int, int], str]:
+    """PGN text of short games numbered ``start`` to ``start + count - 1``."""
+
+    def make(count: int, start: int = 0) -> str:
+        return "".join(
+            f'[Event "Game {number}"]\n[White "white{number}"]\n'
+            f'[Black "black{number}"]\n[Date "2024.01.{number % 28 + 1:02d}"]\n'
+            '[Result "*"]\n\n1. e4 e5 2. Nf3 Nc6 *\n\n'
+            for number in range(start, start + count)
+        )
+
+    return make
@@ -0,0 +1,48 @@
+# tests/unit/fake_uci.py
+"""Minimal UCI engine for pool and session tests.
+
+Answers ``isready`` after ``FAKE_UCI_READY_DELAY`` seconds and every search
+with the first legal move; it crashes when asked to search a position
+without one.
+"""
+
+import os
+import sys
+import time
+import chess
+
+READY_DELAY = float(os.environ.get("FAKE_UCI_READY_DELAY", "0"))
+
+
+def main():
+    board = chess.Board()
+    for line in sys.stdin:
+        command, *args = line.split()
+        if command == "uci":
+            print("id name FakeUCI", flush=True)
+            print("option name Threads type spin default 1 min 1 max 512")
+            print("option name Hash type spin default 16 min 1 max 1024")
+            print("option name MultiPV type spin default 1 min 1 max 500")
+            print("uciok", flush=True)
+        elif command == "isready":
+            time.sleep(READY_DELAY)
+            print("readyok", flush=True)
+        elif command == "position":
+            fen = chess.STARTING_FEN
+            if args[0] == "fen":
+                fen = " ".join(args[1:7])
+            board = chess.Board(fen)
+            if "moves" in args:
+                for uci in args[args.index("moves") + 1 :]:
+                    board.push_uci(uci)
+        elif command == "go":
+            move = next(iter(board.legal_moves)).uci()
+            info = f"info depth 1 multipv 1 score cp 10 nodes 1 time 1 pv {move}"
+            print(info, flush=True)
+            print(f"bestmove {move}", flush=True)
+        elif command == "quit":
+            return
+
+
+if __name__ == "__main__":
+    main()
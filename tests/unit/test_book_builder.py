@@ -0,0 +1,26 @@
+# tests/unit/test_book_builder.py
+import asyncio
+import chess
+import pytest
+
+from src.book.builder import analyze_positions
+from src.scaling.engine_pool import EngineConfig
+
+MATED = "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"
+
+
+class TestAnalyzePositions:
+    @pytest.mark.asyncio
+    async def test_failed_position_is_skipped(self, fake_engine):
+        config = EngineConfig(
+            min_pool_size=1, max_pool_size=1, engine_path=fake_engine()
+        )
+        opening = chess.Board()
+        opening.push_uci("e2e4")
+
+        # The fake engine dies on the mated position
+        entries = await asyncio.wait_for(
+            analyze_positions([chess.STARTING_FEN, MATED, opening.fen()], 1, config),
+            30,
+        )
+        assert len(entries) == 2
@@ -0,0 +1,73 @@
+# tests/unit/test_budget.py
+from typing import Dict, List
+import chess
+import chess.engine
+import pytest
+
+from src.budget import SearchBudget, adaptive_analyse
+
+
+def info(depth: int, move: str, score: int, **bounds) -> Dict:
+    return {
+        "depth": depth,
+        "pv": [chess.Move.from_uci(move)],
+        "score": chess.engine.PovScore(chess.engine.Cp(score), chess.WHITE),
+        **bounds,
+    }
+
+
+class FakeAnalysis:
+    def __init__(self, infos: List[Dict]):
+        self.infos = infos
+        self.multipv: List[Dict] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for line in self.infos:
+            self.multipv = [line]
+            yield line
+
+
+class FakeEngine:
+    def __init__(self, infos: List[Dict]):
+        self.infos = infos
+
+    async def analysis(self, board, limit, multipv=1):
+        return FakeAnalysis(self.infos)
+
+
+class TestAdaptiveAnalyse:
+    @pytest.mark.asyncio
+    async def test_stops_once_best_move_is_stable(self):
+        budget = SearchBudget(depth=20, min_depth=3, stable_iterations=3)
+        infos = [info(depth, "e2e4", 30) for depth in range(1, 25)]
+
+        lines, reason = await adaptive_analyse(FakeEngine(infos), chess.Board(), budget)
+        assert reason == "stable"
+        assert lines[0]["depth"] == 3
+
+    @pytest.mark.asyncio
+    async def test_bound_lines_are_not_iterations(self):
+        budget = SearchBudget(depth=20, min_depth=3, stable_iterations=3)
+        infos = [
+            info(1, "d2d4", 10),
+            info(2, "d2d4", 12),
+            # A fail-low line inside iteration 3 must not settle the search
+            info(3, "d2d4", 14, upperbound=True),
+            info(3, "e2e4", 60),
+            info(4, "e2e4", 62),
+            info(5, "e2e4", 65),
+        ] + [info(depth, "e2e4", 65) for depth in range(6, 25)]
+
+        lines, reason = await adaptive_analyse(FakeEngine(infos), chess.Board(), budget)
+        assert reason == "stable"
+        assert lines[0]["depth"] == 5
+        assert lines[0]["pv"][0] == chess.Move.from_uci("e2e4")
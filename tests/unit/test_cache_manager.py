@@ -0,0 +1,113 @@
+# tests/unit/test_cache_manager.py
+import asyncio
+import fakeredis
+import pytest
+
+from services.common.caching.cache_manager import CacheManager
+
+FEN = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+
+
+def analysis(depth: int) -> dict:
+    line = {"move": "f1b5", "score": 30 + depth, "mate": None, "pv": ["f1b5"]}
+    return {
+        "moves": [line],
+        "depth": depth,
+        "time": 0.1,
+        "nodes": 1000,
+        "score": 30 + depth,
+    }
+
+
+class TestCacheManager:
+    @pytest.mark.asyncio
+    async def test_several_managers_share_one_process(self):
+        redis = fakeredis.FakeAsyncRedis()
+        json_cache = CacheManager(redis)
+        binary_cache = CacheManager(redis, codec="binary", local_cache_size=16)
+
+        assert await binary_cache.cache_analysis(FEN, 12, analysis(12))
+        assert await json_cache.get_cached_analysis(FEN, 12) == analysis(12)
+
+    @pytest.mark.asyncio
+    async def test_writes_only_upgrade_depth(self):
+        cache = CacheManager(fakeredis.FakeAsyncRedis())
+
+        assert await cache.cache_analysis(FEN, 18, analysis(18))
+        assert not await cache.cache_analysis(FEN, 12, analysis(12))
+        assert await cache.get_cached_analysis(FEN, 20) is None
+        assert await cache.get_cached_analysis(FEN, 15) == analysis(18)
+
+        assert await cache.cache_analysis(FEN, 22, analysis(22))
+        assert await cache.get_cached_analysis(FEN, 20) == analysis(22)
+
+    @pytest.mark.asyncio
+    async def test_transpositions_share_an_entry(self):
+        cache = CacheManager(fakeredis.FakeAsyncRedis())
+        await cache.cache_analysis(FEN, 10, analysis(10))
+
+        # Same position reached with different move clocks
+        transposed = FEN.replace(" 2 3", " 6 5")
+        assert await cache.get_cached_analysis(transposed, 10) == analysis(10)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_analyze_once(self):
+        cache = CacheManager(fakeredis.FakeAsyncRedis(), local_cache_size=16)
+        calls = 0
+
+        async def analyze():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return analysis(16)
+
+        results = await asyncio.gather(
+            *(cache.get_or_analyze(FEN, 16, analyze) for _ in range(5))
+        )
+        assert calls == 1
+        assert results == [analysis(16)] * 5
+
+    @pytest.mark.asyncio
+    async def test_waiters_take_over_a_cancelled_analysis(self):
+        cache = CacheManager(fakeredis.FakeAsyncRedis())
+        started = asyncio.Event()
+        calls = 0
+
+        async def analyze():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.05)
+            return analysis(16)
+
+        leader = asyncio.create_task(cache.get_or_analyze(FEN, 16, analyze))
+        await started.wait()
+        waiters = [
+            asyncio.create_task(cache.get_or_analyze(FEN, 16, analyze))
+            for _ in range(3)
+        ]
+        # Let the waiters miss the cache and join the leader
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await asyncio.gather(*waiters) == [analysis(16)] * 3
+        assert calls == 2
+        assert leader.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_failed_cache_write_still_returns_analysis(self, monkeypatch):
+        cache = CacheManager(fakeredis.FakeAsyncRedis())
+
+        async def unavailable(*args, **kwargs):
+            raise ConnectionError("redis is down")
+
+        async def analyze():
+            await asyncio.sleep(0.05)
+            return analysis(16)
+
+        monkeypatch.setattr(cache, "cache_if_deeper", unavailable)
+        results = await asyncio.gather(
+            *(cache.get_or_analyze(FEN, 16, analyze) for _ in range(3))
+        )
+        assert results == [analysis(16)] * 3
+        assert not cache.in_flight
@@ -0,0 +1,43 @@
+# tests/unit/test_codec.py
+import json
+
+from services.common.caching.codec import (
+    BinaryCodec,
+    JSONCodec,
+    decode_move,
+    decode_result,
+    encode_move,
+)
+
+ANALYSIS = {
+    "moves": [
+        {"move": "e2e4", "score": 31, "mate": None, "pv": ["e2e4", "e7e5", "g1f3"]},
+        {"move": "a7a8q", "score": -250, "mate": -3, "pv": ["a7a8q"]},
+    ],
+    "depth": 24,
+    "time": 1.234,
+    "nodes": 4567890,
+    "score": 31,
+}
+
+
+class TestBinaryCodec:
+    def test_round_trip(self):
+        data = BinaryCodec().encode(ANALYSIS)
+        assert data[0] < 0x20
+        assert len(data) < len(JSONCodec().encode(ANALYSIS))
+        assert decode_result(data) == ANALYSIS
+
+    def test_moves_pack_into_16_bits(self):
+        for uci in ("a1h8", "h7h8n", "b2a1q", "e1g1"):
+            assert encode_move(uci) < 1 << 16
+            assert decode_move(encode_move(uci)) == uci
+
+    def test_unsupported_payload_falls_back_to_json(self):
+        result = {"moves": [], "note": "not an engine payload"}
+        data = BinaryCodec().encode(result)
+        assert json.loads(data) == result
+        assert decode_result(data) == result
+
+    def test_reads_json_entries(self):
+        assert decode_result(JSONCodec().encode(ANALYSIS)) == ANALYSIS
@@ -0,0 +1,51 @@
+# tests/unit/test_complexity.py
+from dataclasses import astuple
+import chess
+import numpy as np
+
+from src.services.bulk_complexity import BulkComplexityScorer
+from src.services.complexity import ComplexityAnalyzer
+from src.services.complexity_benchmark import legacy_king_safety, legacy_piece_tension
+
+
+class TestBitboardFeatures:
+    def test_matches_square_scans(self, random_games):
+        analyzer = ComplexityAnalyzer()
+        for moves in random_games[:8]:
+            board = chess.Board()
+            for uci in moves:
+                board.push_uci(uci)
+                tension = analyzer._calculate_piece_tension(board)
+                assert tension == legacy_piece_tension(board)
+                safety = analyzer._calculate_king_safety(board)
+                assert safety == legacy_king_safety(board)
+
+    def test_king_on_a1_is_scored(self):
+        board = chess.Board("8/8/8/8/8/8/1P6/K6k w - - 0 1")
+        assert ComplexityAnalyzer()._calculate_king_safety(board) > 0
+
+
+class TestAnalyzeGame:
+    def test_matches_position_by_position(self, random_games):
+        analyzer = ComplexityAnalyzer()
+        for moves in random_games[:8]:
+            board = chess.Board()
+            expected = [astuple(analyzer.analyze_position(board))]
+            for uci in moves:
+                board.push_uci(uci)
+                expected.append(astuple(analyzer.analyze_position(board)))
+
+            scores = analyzer.analyze_game(moves)
+            np.testing.assert_allclose(
+                [tuple(row) for row in scores], expected, rtol=0, atol=1e-12
+            )
+
+
+class TestBulkComplexityScorer:
+    def test_matches_single_process(self, random_games):
+        games = [(moves, None) for moves in random_games[:6]]
+        bulk = BulkComplexityScorer(workers=2, chunk_size=2).score_games(games)
+
+        analyzer = ComplexityAnalyzer()
+        for index, (moves, _) in enumerate(games):
+            assert bulk.game(index).tolist() == analyzer.analyze_game(moves).tolist()
@@ -0,0 +1,50 @@
+# tests/unit/test_engine_correlation.py
+import pytest
+
+from src.services.engine_correlation import EngineCorrelationScorer
+
+
+def line(ply, played, ranked, scores=None):
+    scores = scores or [50 - 10 * rank for rank in range(len(ranked))]
+    return {
+        "ply": ply,
+        "fen": "",
+        "played": played,
+        "moves": [
+            {"move": move, "score": score, "mate": None, "pv": [move]}
+            for move, score in zip(ranked, scores)
+        ],
+        "score": scores[0] if ranked else None,
+    }
+
+
+class TestSummarize:
+    def test_failed_plies_dont_count_as_misses(self):
+        lines = [
+            line(0, "e2e4", ["e2e4", "d2d4"]),
+            line(1, "e7e5", ["e7e5", "c7c5"]),
+            line(2, "g1f3", ["g1f3", "b1c3"]),
+            {"ply": 3, "fen": "", "played": "b8c6", "error": "Analysis failed"},
+            line(4, "f1b5", ["f1b5", "f1c4"]),
+            line(5, "a7a6", ["a7a6", "g8f6"]),
+        ]
+        scorer = EngineCorrelationScorer()
+        summary = scorer.summarize(scorer.score_game(lines))
+        assert summary["white"].top1_match == 1.0
+        assert summary["black"].top1_match == 1.0
+        assert summary["black"].top3_match == 1.0
+
+    def test_average_loss_is_capped(self):
+        lines = [
+            line(0, "e2e4", ["e2e4", "d2d4"]),
+            line(1, "f7f6", ["e7e5", "f7f6"], scores=[10000, -9990]),
+            line(2, "g1f3", ["g1f3", "b1c3"]),
+            line(3, "e7e5", ["e7e5", "c7c5"], scores=[20, 10]),
+        ]
+        scorer = EngineCorrelationScorer(loss_cap=300)
+        scores = scorer.score_game(lines)
+        assert scores["centipawn_loss"][1] == 19990
+
+        summary = scorer.summarize(scores)
+        assert summary["black"].average_centipawn_loss == pytest.approx(150)
+        assert summary["black"].engine_correlation == pytest.approx(0.5)
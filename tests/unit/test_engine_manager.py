@@ -0,0 +1,88 @@
+# tests/unit/test_engine_manager.py
+from typing import List, Optional
+import chess
+import pytest
+import pytest_asyncio
+
+from src.engine_manager import EngineManager
+
+BLACK_TO_MOVE = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+
+def expected_move(moves: List[str], starting_fen: Optional[str] = None) -> str:
+    """The fake engine always answers with the first legal move."""
+    board = chess.Board(starting_fen) if starting_fen else chess.Board()
+    for uci in moves:
+        board.push_uci(uci)
+    return next(iter(board.legal_moves)).uci()
+
+
+@pytest_asyncio.fixture
+async def manager(fake_engine):
+    manager = EngineManager(fake_engine())
+    manager.pool_size = 2
+    await manager.initialize()
+    yield manager
+    engines = manager.engine_pool + [s.engine for s in manager.sessions.values()]
+    for engine in engines:
+        await engine.quit()
+
+
+class TestGameSessions:
+    def test_several_managers_share_one_process(self):
+        first, second = EngineManager(), EngineManager()
+        assert first.session_plies is second.session_plies
+
+    @pytest.mark.asyncio
+    async def test_plies_reuse_the_pinned_engine(self, manager):
+        moves = ["e2e4", "e7e5", "g1f3"]
+        await manager.analyze_game_position("g1", moves[:1], depth=1)
+        session = manager.sessions["g1"]
+        assert session.warm
+
+        for plies in (2, 3):
+            result = await manager.analyze_game_position("g1", moves[:plies], depth=1)
+            assert result[0]["move"] == expected_move(moves[:plies])
+        assert manager.sessions["g1"] is session
+        assert [move.uci() for move in session.board.move_stack] == moves
+        assert len(manager.engine_pool) == 1
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_game_is_evicted(self, manager):
+        await manager.analyze_game_position("g1", ["e2e4"], depth=1)
+        await manager.analyze_game_position("g2", ["d2d4"], depth=1)
+        await manager.analyze_game_position("g1", ["e2e4", "e7e5"], depth=1)
+        engine = manager.sessions["g2"].engine
+        evictions = manager.session_evictions._value.get()
+
+        await manager.analyze_game_position("g3", ["c2c4"], depth=1)
+        assert list(manager.sessions) == ["g1", "g3"]
+        assert manager.sessions["g3"].engine is engine
+        assert manager.session_evictions._value.get() == evictions + 1
+
+    @pytest.mark.asyncio
+    async def test_takeback_resyncs_from_the_root(self, manager):
+        moves = ["e7e5", "g1f3", "b8c6"]
+        await manager.analyze_game_position(
+            "g1", moves, depth=1, starting_fen=BLACK_TO_MOVE
+        )
+        session = manager.sessions["g1"]
+
+        for line in (moves[:2], ["c7c5"]):
+            result = await manager.analyze_game_position(
+                "g1", line, depth=1, starting_fen=BLACK_TO_MOVE
+            )
+            assert result[0]["move"] == expected_move(line, BLACK_TO_MOVE)
+            assert [move.uci() for move in session.board.move_stack] == line
+            assert session.board.root().fen() == BLACK_TO_MOVE
+
+    @pytest.mark.asyncio
+    async def test_end_game_returns_the_engine(self, manager):
+        await manager.analyze_game_position("g1", ["e2e4"], depth=1)
+        await manager.end_game("g1")
+        await manager.end_game("g1")
+        assert not manager.sessions
+        assert len(manager.engine_pool) == 2
+
+        await manager.analyze_game_position("g1", ["e2e4", "e7e5"], depth=1)
+        assert len(manager.sessions["g1"].board.move_stack) == 2
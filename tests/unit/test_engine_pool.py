@@ -0,0 +1,166 @@
+# tests/unit/test_engine_pool.py
+import asyncio
+import chess
+import chess.engine
+import pytest
+
+from src.scaling.engine_pool import (
+    AdaptiveEnginePool,
+    EngineConfig,
+    PoolExhaustedError,
+)
+
+
+def make_pool(engine_path: str, **kwargs) -> AdaptiveEnginePool:
+    options = dict(
+        min_pool_size=1,
+        max_pool_size=1,
+        engine_path=engine_path,
+        health_check_interval=3600,
+        acquire_timeout=5.0,
+    )
+    options.update(kwargs)
+    return AdaptiveEnginePool(EngineConfig(**options))
+
+
+class TestCheckout:
+    @pytest.mark.asyncio
+    async def test_priority_lanes_are_served_first(self, fake_engine):
+        pool = make_pool(fake_engine())
+        await pool.initialize()
+        try:
+            engine_id, _ = await pool.get_engine()
+            low = asyncio.create_task(pool.get_engine(priority=2))
+            normal = asyncio.create_task(pool.get_engine(priority=1))
+            high = asyncio.create_task(pool.get_engine(priority=0))
+            await asyncio.sleep(0)
+            assert pool.queued_waiters == 3
+
+            order = []
+            pending = {high, normal, low}
+            while pending:
+                # Released engines go straight to a waiter, never idle
+                pool.release_engine(engine_id)
+                assert not pool.idle_engines
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                assert len(done) == 1
+                finished = done.pop()
+                order.append(finished)
+                engine_id, _ = finished.result()
+            assert order == [high, normal, low]
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_waiting_is_bounded(self, fake_engine):
+        pool = make_pool(fake_engine(), max_waiters=1)
+        await pool.initialize()
+        try:
+            await pool.get_engine()
+            with pytest.raises(PoolExhaustedError):
+                await pool.get_engine(timeout=0.05)
+            assert pool.queued_waiters == 0
+
+            waiter = asyncio.create_task(pool.get_engine(timeout=1))
+            await asyncio.sleep(0)
+            with pytest.raises(PoolExhaustedError):
+                await pool.get_engine()
+            waiter.cancel()
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_crashed_engine_is_replaced(self, fake_engine):
+        pool = make_pool(fake_engine())
+        await pool.initialize()
+        try:
+            async with pool.checkout():
+                pool.transports["engine_0"].kill()
+                await asyncio.sleep(0.1)
+
+            async with pool.checkout(timeout=5) as engine:
+                info = await engine.analyse(chess.Board(), chess.engine.Limit(depth=1))
+            assert info["pv"]
+            assert list(pool.engines) == ["engine_1"]
+        finally:
+            await pool.close()
+
+
+class TestHealthCheck:
+    @pytest.mark.asyncio
+    async def test_probed_engine_is_not_handed_out(self, fake_engine):
+        pool = make_pool(fake_engine(delay=0.5))
+        await pool.initialize()
+        try:
+            probe = asyncio.create_task(pool.check_health())
+            await asyncio.sleep(0.1)
+            assert not pool.idle_engines
+
+            # Waits for the probe instead of sharing the engine with it
+            async with pool.checkout() as engine:
+                info = await asyncio.wait_for(
+                    engine.analyse(chess.Board(), chess.engine.Limit(depth=1)), 5
+                )
+            assert info["pv"]
+
+            await asyncio.wait_for(probe, 5)
+            assert list(pool.engines) == ["engine_0"]
+            assert list(pool.idle_engines) == ["engine_0"]
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_probe_keeps_idle_time(self, fake_engine):
+        pool = make_pool(fake_engine())
+        await pool.initialize()
+        try:
+            idle_since = pool.idle_since["engine_0"]
+            await asyncio.sleep(0.05)
+            await pool.check_health()
+            assert pool.idle_since["engine_0"] == idle_since
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_maintenance_survives_leaked_cancellation(
+        self, fake_engine, monkeypatch
+    ):
+        pool = make_pool(fake_engine(), health_check_interval=0.01)
+        calls = 0
+
+        async def check_health():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise asyncio.CancelledError()
+
+        monkeypatch.setattr(pool, "check_health", check_health)
+        await pool.initialize()
+        try:
+            await asyncio.sleep(0.2)
+            assert calls > 1
+            assert any(not task.done() for task in pool.background_tasks)
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelling_maintenance_stops_it(self, fake_engine, monkeypatch):
+        pool = make_pool(fake_engine(), health_check_interval=0.01)
+        checking = asyncio.Event()
+
+        async def check_health():
+            checking.set()
+            await asyncio.sleep(1)
+
+        monkeypatch.setattr(pool, "check_health", check_health)
+        await pool.initialize()
+        try:
+            (task,) = pool.background_tasks
+            await checking.wait()
+            task.cancel()
+            await asyncio.wait([task], timeout=0.5)
+            assert task.cancelled()
+        finally:
+            await pool.close()
@@ -0,0 +1,52 @@
+# tests/unit/test_game_store.py
+import pyarrow.dataset as ds
+
+from services.common.game_store import (
+    GameStoreWriter,
+    default_game_id,
+    games_dataset,
+    moves_dataset,
+)
+from services.common.pgn_handler import PGNHandler
+
+FIELDS = ("move", "clock", "eval", "key")
+
+
+def parse(pgn: str):
+    return list(PGNHandler().process_pgn_file(pgn, fields=FIELDS))
+
+
+class TestDefaultGameId:
+    def test_lichess_url(self, pgn_games):
+        pgn = pgn_games(1).replace(
+            '[Event "Game 0"]',
+            '[Event "Game 0"]\n[Site "https://lichess.org/AbCd1234"]',
+        )
+        assert default_game_id(parse(pgn)[0]) == "AbCd1234"
+
+    def test_shared_site_names_get_distinct_ids(self, pgn_games):
+        for site in ("Chess.com", "Berlin GER", "?"):
+            pgn = pgn_games(20).replace("[Result", f'[Site "{site}"]\n[Result')
+            ids = [default_game_id(game) for game in parse(pgn)]
+            assert len(set(ids)) == 20
+            assert ids == [default_game_id(game) for game in parse(pgn)]
+
+
+class TestGameStoreWriter:
+    def test_round_trip(self, tmp_path, pgn_games):
+        root = str(tmp_path / "store")
+        writer = GameStoreWriter(root, batch_size=7)
+        for game in parse(pgn_games(30)):
+            writer.add(game)
+        writer.close()
+
+        games = games_dataset(root).to_table(
+            columns=["game_id", "white", "ply_count"],
+            filter=ds.field("month") == "2024-01",
+        )
+        assert games.num_rows == 30
+        assert len(set(games.column("game_id").to_pylist())) == 30
+        assert set(games.column("ply_count").to_pylist()) == {4}
+
+        moves = moves_dataset(root).to_table(columns=["uci"])
+        assert moves.column("uci")[0].as_py() == ["e2e4", "e7e5", "g1f3", "b8c6"]
@@ -0,0 +1,206 @@
+# tests/unit/test_main.py
+from typing import List
+import asyncio
+import json
+import chess
+import chess.engine
+import chess.polyglot
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from src import main
+from src.book.store import BookEntry, OpeningBook, write_book
+from src.main import (
+    BOOK_LOOKUPS,
+    BatchAnalysisRequest,
+    analyze_batch,
+    app,
+    book_analysis,
+    build_budget,
+    build_pool_config,
+    replay_game,
+)
+from src.scaling.engine_pool import AdaptiveEnginePool, EngineConfig
+
+MOVES = ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5"]
+
+
+def lookups(result: str) -> float:
+    return BOOK_LOOKUPS.labels(result=result)._value.get()
+
+
+@pytest_asyncio.fixture
+async def pool(fake_engine, monkeypatch):
+    pool = AdaptiveEnginePool(
+        EngineConfig(
+            min_pool_size=2,
+            max_pool_size=2,
+            engine_path=fake_engine(),
+            health_check_interval=3600,
+            acquire_timeout=5.0,
+        )
+    )
+    await pool.initialize()
+    monkeypatch.setattr(app.state, "engine_pool", pool, raising=False)
+    monkeypatch.setattr(app.state, "book", None, raising=False)
+    yield pool
+    await pool.close()
+
+
+def replay_board(moves: List[str]) -> chess.Board:
+    board = chess.Board()
+    for uci in moves:
+        board.push_uci(uci)
+    return board
+
+
+async def read_lines(request: BatchAnalysisRequest) -> List[dict]:
+    response = await analyze_batch(request)
+    return [json.loads(line) async for line in response.body_iterator]
+
+
+@pytest.fixture
+def book(tmp_path, monkeypatch):
+    opening = chess.Board()
+    opening.push_uci("e2e4")
+    entries = [
+        BookEntry(
+            key=chess.polyglot.zobrist_hash(chess.Board()),
+            depth=20,
+            score=30,
+            mate=None,
+            nodes=1000,
+            pv=[chess.Move.from_uci("e2e4")],
+        ),
+        # Stored without a line, e.g. a mated or stalemated search
+        BookEntry(
+            key=chess.polyglot.zobrist_hash(opening),
+            depth=20,
+            score=0,
+            mate=None,
+            nodes=0,
+            pv=[],
+        ),
+    ]
+    path = str(tmp_path / "book.bin")
+    write_book(path, entries)
+    book = OpeningBook(path)
+    monkeypatch.setattr(app.state, "book", book, raising=False)
+    yield book
+    book.close()
+
+
+class TestBookAnalysis:
+    def test_answers_from_the_book(self, book):
+        hits = lookups("hit")
+        booked = book_analysis(chess.Board(), 18, 1, None)
+        assert booked["moves"][0]["move"] == "e2e4"
+        assert booked["depth"] == 20
+        assert lookups("hit") == hits + 1
+
+    def test_entry_without_a_line_is_a_miss(self, book):
+        board = chess.Board()
+        board.push_uci("e2e4")
+        hits, misses = lookups("hit"), lookups("miss")
+        assert book_analysis(board, 18, 1, None) is None
+        assert (lookups("hit"), lookups("miss")) == (hits, misses + 1)
+
+    def test_unbounded_depth_skips_the_book(self, book):
+        assert book_analysis(chess.Board(), None, 1, None) is None
+
+
+class TestBuildBudget:
+    def test_unbounded_depth_gets_the_default(self, monkeypatch):
+        monkeypatch.setenv("ADAPTIVE_DEPTH", "18")
+        budget = build_budget(None, None)
+        assert budget.depth == 18
+        assert budget.min_depth <= budget.depth
+
+
+class TestBuildPoolConfig:
+    def test_pool_scales_down_to_one_engine(self, monkeypatch):
+        monkeypatch.setenv("ENGINE_POOL_SIZE", "4")
+        monkeypatch.delenv("ENGINE_POOL_MIN", raising=False)
+        config = build_pool_config()
+        assert (config.min_pool_size, config.max_pool_size) == (1, 4)
+
+
+class TestReplayGame:
+    def test_snapshots_every_position_with_legal_moves(self):
+        positions = replay_game(BatchAnalysisRequest(moves=MOVES))
+        assert [ply for ply, _, _ in positions] == list(range(len(MOVES) + 1))
+        assert [move for _, _, move in positions] == MOVES + [None]
+        assert positions[-1][1].fen() == replay_board(MOVES).fen()
+
+    def test_mated_position_is_not_analysed(self):
+        moves = ["f2f3", "e7e5", "g2g4", "d8h4"]
+        positions = replay_game(BatchAnalysisRequest(moves=moves))
+        assert [ply for ply, _, _ in positions] == [0, 1, 2, 3]
+
+    def test_illegal_move_is_rejected(self):
+        with pytest.raises(ValueError, match="ply 2"):
+            replay_game(BatchAnalysisRequest(moves=["e2e4", "e7e5", "e2e4"]))
+
+
+class TestAnalyzeBatch:
+    @pytest.mark.asyncio
+    async def test_streams_one_line_per_ply(self, pool):
+        lines = await read_lines(BatchAnalysisRequest(moves=MOVES, depth=1))
+
+        # Lines come in completion order; each names its ply
+        assert sorted(line["ply"] for line in lines) == list(range(len(MOVES) + 1))
+        for line in lines:
+            board = replay_board(MOVES[: line["ply"]])
+            assert line["fen"] == board.fen()
+            assert line["played"] == (MOVES + [None])[line["ply"]]
+            assert line["moves"][0]["move"] == next(iter(board.legal_moves)).uci()
+
+    @pytest.mark.asyncio
+    async def test_bad_move_mid_batch_is_rejected_before_streaming(self, pool):
+        request = BatchAnalysisRequest(moves=["e2e4", "e7e5", "e2e4"], depth=1)
+        with pytest.raises(HTTPException) as error:
+            await analyze_batch(request)
+        assert error.value.status_code == 400
+        assert pool.queued_waiters == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_ply_does_not_stop_the_batch(self, pool, monkeypatch):
+        run_search = main.run_search
+
+        async def failing_search(engine, board, request, complexity=None):
+            if board.ply() == 2:
+                raise chess.engine.EngineError("search failed")
+            return await run_search(engine, board, request, complexity)
+
+        monkeypatch.setattr(main, "run_search", failing_search)
+        lines = await read_lines(BatchAnalysisRequest(moves=MOVES, depth=1))
+        errors = {line["ply"]: line.get("error") for line in lines}
+        assert errors.pop(2) == "Analysis failed"
+        assert set(errors.values()) == {None}
+        assert len(errors) == len(MOVES)
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_queued_plies(self, pool, monkeypatch):
+        searches = []
+        blocked = asyncio.Event()
+
+        async def search(engine, board, request, complexity=None):
+            searches.append(asyncio.current_task())
+            if board.ply() == 0:
+                limit = chess.engine.Limit(depth=1)
+                return await engine.analyse(board, limit, multipv=1)
+            await blocked.wait()
+
+        monkeypatch.setattr(main, "run_search", search)
+        response = await analyze_batch(BatchAnalysisRequest(moves=MOVES, depth=1))
+        stream = response.body_iterator
+        first = json.loads(await stream.__anext__())
+        assert first["ply"] == 0 and "error" not in first
+
+        # What the server does when the client goes away
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        assert searches and all(task.cancelled() for task in searches[1:])
+        assert pool.queued_waiters == 0
+        assert len(pool.idle_engines) == len(pool.engines)
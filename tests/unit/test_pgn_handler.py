@@ -0,0 +1,98 @@
+# tests/unit/test_pgn_handler.py
+import pytest
+
+from services.common.pgn_handler import PGNHandler, header_filter
+
+GAMES = r"""[Event "Rated Blitz game"]
+[White "Magnus \"DrNykterstein\" C"]
+[Black "back\\slash"]
+[WhiteElo "2850"]
+[BlackElo "2700"]
+[TimeControl "180+2"]
+
+1. e4 { [%clk 0:02:58] } 1... e5
+{ [%clk 0:02:59] }
+[%evp 0.2] 2. Nf3 Nc6 1-0
+
+[Event "Casual game"]
+[White "alice"]
+[Black "bob"]
+
+1. d4 d5
+2. c4 *
+
+[Event   "Odd spacing"]
+[White	"carol"]
+[Black "dave"]
+[WhiteElo "?"]
+[BlackElo "1900"]
+[TimeControl "600+0"]
+
+1. c4 *
+"""
+
+
+@pytest.fixture
+def archive(tmp_path):
+    def write(newline: str = "\n") -> str:
+        path = tmp_path / "games.pgn"
+        path.write_bytes(GAMES.replace("\n", newline).encode())
+        return str(path)
+
+    return write
+
+
+class TestScanHeaders:
+    @pytest.mark.parametrize("newline", ["\n", "\r\n"])
+    def test_one_section_per_game(self, archive, newline):
+        headers = [h for _, h in PGNHandler().scan_headers(archive(newline))]
+        # Comments and movetext lines starting with "[" are not tag sections
+        assert [h["Event"] for h in headers] == [
+            "Rated Blitz game",
+            "Casual game",
+            "Odd spacing",
+        ]
+        assert headers[2]["White"] == "carol"
+
+    def test_escaped_values(self, archive):
+        _, headers = next(PGNHandler().scan_headers(archive()))
+        assert headers["White"] == 'Magnus "DrNykterstein" C'
+        assert headers["Black"] == "back\\slash"
+
+    def test_offsets_point_at_games(self, archive):
+        path = archive("\r\n")
+        handler = PGNHandler()
+        offsets = [offset for offset, _ in handler.scan_headers(path)]
+        games = list(handler.read_games_at(path, offsets, ("move",)))
+        assert len(games) == 3
+        assert [game["black"]["name"] for game in games[1:]] == ["bob", "dave"]
+
+    def test_start_skips_earlier_games(self, archive):
+        path = archive()
+        handler = PGNHandler()
+        offsets = [offset for offset, _ in handler.scan_headers(path)]
+        later = [offset for offset, _ in handler.scan_headers(path, start=offsets[1])]
+        assert later == offsets[1:]
+
+
+class TestHeaderFilter:
+    def events(self, path, **criteria):
+        scan = PGNHandler().scan_headers(path, header_filter(**criteria))
+        return [headers["Event"] for _, headers in scan]
+
+    def test_missing_tags_do_not_match(self, archive):
+        path = archive()
+        assert self.events(path, time_controls=["180+2", "600+0"]) == [
+            "Rated Blitz game",
+            "Odd spacing",
+        ]
+        # "?" and absent ratings are unknown, the other side can still match
+        assert self.events(path, min_elo=1800, max_elo=2000) == ["Odd spacing"]
+        assert self.events(path, min_elo=1000) == ["Rated Blitz game", "Odd spacing"]
+
+    def test_players_on_either_side(self, archive):
+        path = archive()
+        assert self.events(path, players=["bob", "carol"]) == [
+            "Casual game",
+            "Odd spacing",
+        ]
@@ -0,0 +1,55 @@
+# tests/unit/test_pgn_import.py
+import asyncio
+import gzip
+import pytest
+
+from services.common.pgn_import import PGNImporter
+
+GAMES = 600
+
+
+@pytest.fixture(params=["plain", "gzip"])
+def archive(request, tmp_path, pgn_games):
+    path = tmp_path / "games.pgn"
+    path.write_text(pgn_games(GAMES))
+    if request.param == "gzip":
+        compressed = tmp_path / "games.pgn.gz"
+        compressed.write_bytes(gzip.compress(path.read_bytes()))
+        return str(compressed)
+    return str(path)
+
+
+class TestPGNImporter:
+    def test_resume_stores_every_game_once(self, archive, tmp_path):
+        checkpoint = str(tmp_path / "import.checkpoint")
+        stored = []
+
+        def stored_in_order() -> bool:
+            return stored == [f"white{number}" for number in range(len(stored))]
+
+        async def failing_store(games):
+            # Fail once a chunk got ahead of an earlier one, or halfway through
+            if not stored_in_order() or len(stored) > GAMES // 2:
+                raise RuntimeError("database went away")
+            stored.extend(game["white"]["name"] for game in games)
+
+        async def store(games):
+            stored.extend(game["white"]["name"] for game in games)
+
+        importer = PGNImporter(workers=2, chunk_size=4096, fields=("move",))
+        with pytest.raises(RuntimeError):
+            asyncio.run(importer.run(archive, failing_store, checkpoint))
+        assert 0 < len(stored) < GAMES
+
+        asyncio.run(importer.run(archive, store, checkpoint))
+        assert sorted(stored) == sorted(f"white{number}" for number in range(GAMES))
+
+    def test_games_arrive_in_file_order(self, archive):
+        stored = []
+
+        async def store(games):
+            stored.extend(game["white"]["name"] for game in games)
+
+        importer = PGNImporter(workers=2, chunk_size=4096, fields=("move",))
+        assert asyncio.run(importer.run(archive, store)) == GAMES
+        assert stored == [f"white{number}" for number in range(GAMES)]
@@ -0,0 +1,60 @@
+# tests/unit/test_pgn_index.py
+from services.common.pgn_handler import PGNHandler
+from services.common.pgn_index import PGNIndex
+
+
+def white_players(path, index, numbers):
+    games = PGNHandler().read_games_at(str(path), index.offsets(numbers), ("move",))
+    return [game["white"]["name"] for game in games]
+
+
+class TestPGNIndex:
+    def test_append_to_archive(self, tmp_path, pgn_games):
+        path = tmp_path / "games.pgn"
+        path.write_text(pgn_games(300))
+        index = PGNIndex(str(path))
+        assert index.update() == 300
+        assert index.update() == 0
+
+        with open(path, "a") as archive:
+            archive.write(pgn_games(300, start=300))
+        assert index.update() == 300
+        assert len(index) == 600
+        assert white_players(path, index, [0, 299, 300, 599]) == [
+            "white0",
+            "white299",
+            "white300",
+            "white599",
+        ]
+
+    def test_archive_cut_mid_tag_section(self, tmp_path, pgn_games):
+        text = pgn_games(600)
+        cut = text.index('[Black "black230"]')
+        path = tmp_path / "games.pgn"
+        path.write_text(text[:cut])
+        index = PGNIndex(str(path))
+        index.update()
+
+        with open(path, "a") as archive:
+            archive.write(text[cut:])
+        index.update()
+
+        assert len(index) == 600
+        assert white_players(path, index, [229, 230, 231, 599]) == [
+            "white229",
+            "white230",
+            "white231",
+            "white599",
+        ]
+        assert len(index.find(player="black230")) == 1
+
+    def test_rewritten_archive_is_reindexed(self, tmp_path, pgn_games):
+        path = tmp_path / "games.pgn"
+        path.write_text(pgn_games(50))
+        index = PGNIndex(str(path))
+        index.update()
+
+        path.write_text(pgn_games(20, start=1000))
+        index.update()
+        assert len(index) == 20
+        assert white_players(path, index, [0]) == ["white1000"]
@@ -0,0 +1,40 @@
+# tests/unit/test_pgn_io.py
+import bz2
+import gzip
+import pytest
+
+from services.common.pgn_handler import PGNHandler
+from services.common.pgn_io import compression, open_pgn
+
+
+def zstd_compress(data: bytes) -> bytes:
+    zstandard = pytest.importorskip("zstandard")
+    # Long-distance matching, as in the Lichess dumps
+    params = zstandard.ZstdCompressionParameters.from_level(
+        19, enable_ldm=True, window_log=27
+    )
+    return zstandard.ZstdCompressor(compression_params=params).compress(data)
+
+
+COMPRESSORS = {
+    None: lambda data: data,
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "zstd": zstd_compress,
+}
+
+
+class TestOpenPGN:
+    @pytest.mark.parametrize("kind", list(COMPRESSORS))
+    def test_round_trip(self, tmp_path, pgn_games, kind):
+        text = pgn_games(200)
+        path = tmp_path / "games.pgn"
+        path.write_bytes(COMPRESSORS[kind](text.encode()))
+
+        assert compression(str(path)) == kind
+        with open_pgn(str(path)) as pgn_file:
+            assert pgn_file.read() == text
+
+        games = list(PGNHandler().process_pgn_path(str(path), ("move",)))
+        assert len(games) == 200
+        assert games[-1]["white"]["name"] == "white199"
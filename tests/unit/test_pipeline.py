@@ -0,0 +1,97 @@
+# tests/unit/test_pipeline.py
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from services.common.pgn_handler import PGNHandler
+from src.models.analysis import Base, MoveAnalysis
+from src.services.engine_correlation import EngineCorrelationScorer
+from src.services.pipeline import GameAnalysisStage, move_times_from_clocks
+
+PGN = """[Event "Rated Blitz game"]
+[Site "https://lichess.org/abcdEFGH"]
+[White "alice"]
+[Black "bob"]
+[Result "1-0"]
+[TimeControl "180+2"]
+
+1. e4 { [%clk 0:02:58] } 1... e5 { [%clk 0:02:59] } 2. Nf3 { [%clk 0:02:50] }
+2... Nc6 { [%clk 0:02:55] } 3. Bb5 { [%clk 0:02:47] } 3... a6 { [%clk 0:02:40] }
+4. Ba4 { [%clk 0:02:45] } 1-0
+"""
+
+
+# Set up with black to move: black plays the first ply
+BLACK_FIRST_PGN = """[Event "Rated Blitz game"]
+[White "alice"]
+[Black "bob"]
+[Result "*"]
+[TimeControl "180+0"]
+[SetUp "1"]
+[FEN "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"]
+
+1... e5 { [%clk 0:02:59] } 2. Nf3 { [%clk 0:02:40] } 2... Nc6 { [%clk 0:02:58] }
+3. Bb5 { [%clk 0:02:20] } 3... a6 { [%clk 0:02:57] } *
+"""
+
+
+@pytest.fixture
+def game():
+    return next(PGNHandler().process_pgn_file(PGN))
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+class TestMoveTimes:
+    def test_first_move_has_no_increment(self):
+        times = move_times_from_clocks([178, 179, 170, 175], "180+2")
+        assert times.tolist() == [2, 1, 10, 6]
+
+    def test_missing_clocks(self):
+        times = move_times_from_clocks([178, None, 170, 175], "-")
+        assert np.isnan(times).tolist() == [True, True, False, True]
+
+
+class TestAnalyze:
+    def test_black_to_move_start(self):
+        game = next(PGNHandler().process_pgn_file(BLACK_FIRST_PGN))
+        analysis = GameAnalysisStage().analyze("g1", game)
+        assert analysis.timing["black"].average_time == pytest.approx(1.0)
+        assert analysis.timing["white"].average_time == pytest.approx(20.0)
+
+
+class TestProcess:
+    def test_reprocessing_replaces_plies(self, session, game):
+        stage = GameAnalysisStage()
+        stage.process(session, "g1", game)
+        stage.process(session, "g1", game)
+        count = session.scalar(select(func.count()).select_from(MoveAnalysis))
+        assert count == len(game["moves"])
+
+    def test_keeps_engine_correlation(self, session, game):
+        stage = GameAnalysisStage()
+        analysis = stage.process(session, "g1", game)
+
+        scorer = EngineCorrelationScorer()
+        lines = [
+            {
+                "ply": ply,
+                "fen": fen,
+                "played": move,
+                "moves": [{"move": move, "score": 20, "mate": None, "pv": [move]}],
+                "score": 20,
+            }
+            for ply, (fen, move) in enumerate(zip(analysis.fens, analysis.moves))
+        ]
+        scorer.write(session, scorer.rows("g1", lines, scorer.score_game(lines)))
+        stage.process(session, "g1", game)
+
+        correlations = session.scalars(select(MoveAnalysis.engine_correlation)).all()
+        assert correlations == [1.0] * len(game["moves"])
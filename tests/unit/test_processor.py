@@ -0,0 +1,73 @@
+# tests/unit/test_processor.py
+import pickle
+import chess
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.data.processor import (  # noqa: E402
+    ChessDataset,
+    GameData,
+    MoveTokenizer,
+    PretokenizedChessDataset,
+    pretokenize,
+)
+
+PROMOTING = "8/P6k/8/8/8/8/6Kp/8 w - - 0 1"
+
+
+def make_game(moves, elo: int) -> GameData:
+    return GameData(
+        moves=moves,
+        times=[float(ply % 7) + 0.5 for ply in range(len(moves))],
+        evals=[ply * 0.25 for ply in range(len(moves))],
+        result="*",
+        white_elo=elo,
+        black_elo=elo + 1,
+    )
+
+
+@pytest.fixture
+def games(random_games):
+    return [make_game(moves, 1500 + index) for index, moves in enumerate(random_games)]
+
+
+class TestMoveTokenizer:
+    def test_ids_are_unique_and_in_vocabulary(self):
+        tokenizer = MoveTokenizer()
+        moves = {
+            move.uci()
+            for fen in (chess.STARTING_FEN, PROMOTING)
+            for move in chess.Board(fen).legal_moves
+        }
+        board = chess.Board(PROMOTING)
+        board.turn = chess.BLACK
+        moves.update(move.uci() for move in board.legal_moves)
+
+        ids = tokenizer.encode(sorted(moves))
+        assert len(set(ids)) == len(moves)
+        assert all(1 < token < tokenizer.vocab_size for token in ids)
+        assert tokenizer.encode_move("not-a-move") == MoveTokenizer.UNKNOWN
+
+
+class TestPretokenizedChessDataset:
+    def test_matches_chess_dataset(self, games, tmp_path):
+        pretokenize(games, str(tmp_path), max_sequence_length=64)
+        dataset = PretokenizedChessDataset(str(tmp_path))
+        reference = ChessDataset(games, max_sequence_length=64)
+
+        assert len(dataset) == len(games)
+        for index in range(len(games)):
+            item, expected = dataset[index], reference[index]
+            assert item.keys() == expected.keys()
+            for name, tensor in expected.items():
+                assert torch.equal(item[name], tensor.to(item[name].dtype)), name
+
+    def test_pickles_without_its_maps(self, games, tmp_path):
+        pretokenize(games[:2], str(tmp_path), max_sequence_length=16)
+        dataset = PretokenizedChessDataset(str(tmp_path))
+        first = dataset[0]
+
+        restored = pickle.loads(pickle.dumps(dataset))
+        assert restored.arrays is None
+        assert torch.equal(restored[0]["move_ids"], first["move_ids"])
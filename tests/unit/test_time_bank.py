@@ -0,0 +1,27 @@
+# tests/unit/test_time_bank.py
+from dataclasses import astuple
+import numpy as np
+
+from src.services.time_bank import TimeBankAnalyzer
+from src.services.timing import pad_batch
+
+
+class TestAnalyzeBatch:
+    def test_matches_scalar_path(self):
+        rng = np.random.default_rng(3)
+        games = []
+        for length in [0, 1, 2, 5, 40, 120]:
+            times = rng.gamma(2.0, 4.0, length)
+            remaining = np.maximum(180 - np.cumsum(times), 0)
+            games.append((times, remaining, rng.random(length)))
+
+        analyzer = TimeBankAnalyzer()
+        padded = [pad_batch([game[field] for game in games]) for field in range(3)]
+        batch = analyzer.analyze_batch(
+            padded[0][0], padded[1][0], padded[2][0], padded[0][1]
+        )
+        for row, (times, remaining, complexity) in zip(batch, games):
+            expected = analyzer.analyze_time_management(
+                times.tolist(), remaining.tolist(), complexity.tolist()
+            )
+            np.testing.assert_allclose(tuple(row), astuple(expected), rtol=0, atol=1e-9)
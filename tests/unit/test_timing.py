@@ -0,0 +1,83 @@
+# tests/unit/test_timing.py
+from dataclasses import astuple
+import numpy as np
+import pytest
+
+from src.services.timing import (
+    TIMING_DTYPE,
+    StreamingTimingAnalyzer,
+    TimingAnalyzer,
+    pad_batch,
+)
+
+
+@pytest.fixture
+def timed_games():
+    rng = np.random.default_rng(7)
+    games = []
+    for length in [0, 1, 2, 3, 4, 5, 6, 12, 40, 90]:
+        times = rng.gamma(2.0, 5.0, length)
+        times[rng.random(length) < 0.05] *= 8  # a few long thinks
+        games.append((times.tolist(), rng.random(length).tolist()))
+    games.append(([3.0] * 10, [0.5] * 10))  # constant input
+    return games
+
+
+def scalar_rows(games):
+    analyzer = TimingAnalyzer()
+    return [
+        astuple(analyzer.analyze_move_timing(times, complexity))
+        for times, complexity in games
+    ]
+
+
+class TestAnalyzeBatch:
+    def test_matches_scalar_path(self, timed_games):
+        times, lengths = pad_batch([times for times, _ in timed_games])
+        complexity, _ = pad_batch([complexity for _, complexity in timed_games])
+
+        batch = TimingAnalyzer().analyze_batch(times, complexity, lengths)
+        for row, expected in zip(batch, scalar_rows(timed_games)):
+            np.testing.assert_allclose(
+                tuple(row), expected, rtol=0, atol=1e-9, equal_nan=True
+            )
+
+    def test_empty_games(self):
+        times, lengths = pad_batch([[], []])
+        batch = TimingAnalyzer().analyze_batch(times, times, lengths)
+        assert batch.dtype == TIMING_DTYPE
+        assert batch["consistency"].tolist() == [1.0, 1.0]
+
+
+class TestStreamingTimingAnalyzer:
+    def test_matches_scalar_path_move_by_move(self, timed_games):
+        analyzer = TimingAnalyzer()
+        times, complexity = timed_games[-2]
+        streaming = StreamingTimingAnalyzer()
+        for moves in range(1, len(times) + 1):
+            live = streaming.update(times[moves - 1], complexity[moves - 1])
+            expected = analyzer.analyze_move_timing(times[:moves], complexity[:moves])
+            # Outliers are scored when played, the rest must agree
+            for field in (
+                "consistency",
+                "correlation_with_complexity",
+                "average_time",
+                "deviation_pattern",
+            ):
+                np.testing.assert_allclose(
+                    getattr(live, field),
+                    getattr(expected, field),
+                    rtol=0,
+                    atol=1e-9,
+                    equal_nan=True,
+                )
+
+    def test_state_round_trip(self, timed_games):
+        times, complexity = timed_games[-3]
+        original = StreamingTimingAnalyzer()
+        for time, score in zip(times[:20], complexity[:20]):
+            original.update(time, score)
+
+        restored = StreamingTimingAnalyzer.from_dict(original.to_dict())
+        for time, score in zip(times[20:], complexity[20:]):
+            assert restored.update(time, score) == original.update(time, score)
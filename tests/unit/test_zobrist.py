@@ -0,0 +1,32 @@
+# tests/unit/test_zobrist.py
+import chess
+import chess.polyglot
+
+from services.common.zobrist import ZobristTracker, fen_key, position_key, to_signed
+
+
+class TestZobrist:
+    def test_tracker_matches_polyglot(self, random_games):
+        for moves in random_games:
+            board = chess.Board()
+            tracker = ZobristTracker(chess.Board())
+            for uci in moves:
+                board.push_uci(uci)
+                key = tracker.push(chess.Move.from_uci(uci))
+                assert key == to_signed(chess.polyglot.zobrist_hash(board))
+
+    def test_special_moves(self):
+        # Castling, en passant and promotion with capture
+        moves = "e2e4 g8f6 e4e5 d7d5 e5d6 e7d6 g1f3 f8e7 f1e2 e8g8 e1g1 b7b5".split()
+        moves += "a2a4 b5a4 b2b3 a4b3 c2c3 b3b2 d2d3 b2a1q".split()
+        board = chess.Board()
+        keys = ZobristTracker().replay(chess.Move.from_uci(uci) for uci in moves)
+        assert keys[0] == position_key(board)
+        for uci, key in zip(moves, keys[1:]):
+            board.push_uci(uci)
+            assert key == position_key(board)
+
+    def test_keys_ignore_move_clocks(self):
+        start = chess.STARTING_FEN
+        assert fen_key(start) == fen_key(start.replace(" 0 1", " 12 30"))
+        assert -(1 << 63) <= fen_key(start) < 1 << 63